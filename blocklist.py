@@ -0,0 +1,314 @@
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from array import array
+from collections import deque
+
+from ioc_scanner import Match
+
+# Blocklist matching with an Aho-Corasick automaton.
+#
+# Checking each line against hundreds of thousands of domains, hashes or
+# user agents with `in`, or with one huge regex alternation, costs time in
+# proportion to the number of keywords. The automaton is a trie of all the
+# keywords plus, for every node, a "fail" link to the longest suffix of it
+# that is also in the trie. Scanning follows one edge per input byte, so
+# all the keywords are found in a single pass whose cost does not depend
+# on how many there are.
+#
+# Building the automaton for a big list takes a while, so it is built once
+# and saved; loading the saved file only reads flat arrays back:
+#
+#   python blocklist.py build blocked.acbl bad_domain=domains.txt md5=hashes.txt -i
+#   python blocklist.py scan blocked.acbl /var/log/access.log
+#   python ioc_extract.py --blocklist blocked.acbl /var/log/access.log
+#
+# Matches are ioc_scanner.Match tuples whose type is the keyword's label,
+# so they go through the same pipeline as the regex_examples patterns.
+
+MAGIC = b"ACBL1\n"
+BLOCK_SIZE = 1024 * 1024
+
+# Edge markers in `single` (real edges are bytes, 0-255).
+NONE = 256          # no children
+MULTI = 257         # several children, looked up in `goto`
+
+# With whole_words, a keyword that starts or ends with one of these must
+# not be part of a longer word: "evil.com" is not found in "notevil.com",
+# but is in "cdn.evil.com".
+WORD = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_")
+
+
+class KeywordMatcher:
+    """Finds every occurrence of a set of keywords in bytes, in one pass.
+
+    add() every keyword, then finish(); or use build() / load(). With
+    ignore_case keywords and input are compared ASCII case-insensitively.
+
+    Most trie nodes have a single child (long keywords share little), so
+    nodes are kept in flat arrays, with the edge of a one-child node stored
+    inline and only branching nodes in the `goto` dict. That keeps a
+    million-node automaton in tens of MB instead of a dict per node.
+    """
+
+    def __init__(self, ignore_case=False, whole_words=True):
+        self.ignore_case = ignore_case
+        self.whole_words = whole_words
+        self.labels = []
+        self.label_of = array("H")      # keyword index -> label index
+        self.keywords = []              # as given, reported as the match value
+        # Per node:
+        self.single = array("H", [NONE])    # byte of the only edge, NONE or MULTI
+        self.child = array("I", [0])        # target of that edge
+        self.output = array("i", [-1])      # keyword ending here, or -1
+        self.fail = self.hits = self.link = None    # set by finish()
+        self.goto = {}                  # node << 8 | byte -> child, branching nodes
+        self.branches = {}              # node -> its edge bytes, while building
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _next(self, node, byte):
+        single = self.single[node]
+        if single == byte:
+            return self.child[node]
+        if single == MULTI:
+            return self.goto.get(node << 8 | byte)
+        return None
+
+    def _add_edge(self, node, byte):
+        new = len(self.output)
+        self.single.append(NONE)
+        self.child.append(0)
+        self.output.append(-1)
+        single = self.single[node]
+        if single == NONE:
+            self.single[node] = byte
+            self.child[node] = new
+            return new
+        if single != MULTI:
+            self.goto[node << 8 | single] = self.child[node]
+            self.branches[node] = [single]
+            self.single[node] = MULTI
+        self.goto[node << 8 | byte] = new
+        self.branches[node].append(byte)
+        return new
+
+    def add(self, keyword, label="keyword"):
+        if self.branches is None:
+            raise ValueError("a loaded matcher cannot be extended")
+        if isinstance(keyword, str):
+            keyword = keyword.encode()
+        if not keyword:
+            return
+        node = 0
+        for byte in keyword.lower() if self.ignore_case else keyword:
+            target = self._next(node, byte)
+            node = self._add_edge(node, byte) if target is None else target
+        if self.output[node] != -1:
+            return                      # duplicate: the first label wins
+        if label not in self.labels:
+            self.labels.append(label)
+        self.output[node] = len(self.keywords)
+        self.keywords.append(keyword)
+        self.label_of.append(self.labels.index(label))
+        self.fail = None
+
+    def finish(self):
+        # Fail links, breadth first so that every node's fail target (which
+        # is shallower) is done before it. hits[n] is the first node on n's
+        # fail chain, itself included, where a keyword ends (0: none), and
+        # link[n] the next one after n.
+        size = len(self.output)
+        fail = array("I", bytes(4 * size))
+        hits = array("I", bytes(4 * size))
+        link = array("I", bytes(4 * size))
+        queue = deque([0])
+        while queue:
+            node = queue.popleft()
+            single = self.single[node]
+            if single == NONE:
+                continue
+            for byte in self.branches[node] if single == MULTI else (single,):
+                new = self._next(node, byte)
+                if node:
+                    f = fail[node]
+                    while True:
+                        target = self._next(f, byte)
+                        if target is not None or not f:
+                            break
+                        f = fail[f]
+                    fail[new] = target or 0
+                link[new] = hits[fail[new]]
+                hits[new] = new if self.output[new] != -1 else link[new]
+                queue.append(new)
+        self.fail, self.hits, self.link = fail, hits, link
+        return self
+
+    @classmethod
+    def build(cls, sources, ignore_case=False, whole_words=True):
+        """sources: (label, path) pairs of keyword files, one keyword per
+        line; blank lines and lines starting with # are ignored."""
+        matcher = cls(ignore_case, whole_words)
+        for label, path in sources:
+            with open(path, "rb") as file:
+                for line in file:
+                    line = line.strip()
+                    if line and not line.startswith(b"#"):
+                        matcher.add(line, label)
+        return matcher.finish()
+
+    def save(self, path):
+        if self.fail is None:
+            self.finish()
+        offsets = array("Q", [0])
+        for keyword in self.keywords:
+            offsets.append(offsets[-1] + len(keyword))
+        arrays = [
+            ("label_of", self.label_of),
+            ("offsets", offsets),
+            ("single", self.single),
+            ("child", self.child),
+            ("output", self.output),
+            ("fail", self.fail),
+            ("hits", self.hits),
+            ("link", self.link),
+            ("goto_keys", array("Q", self.goto.keys())),
+            ("goto_values", array("I", self.goto.values())),
+        ]
+        blob = b"".join(self.keywords)
+        header = {"ignore_case": self.ignore_case, "whole_words": self.whole_words,
+                  "labels": self.labels, "byteorder": sys.byteorder, "blob": len(blob),
+                  "arrays": [[name, a.typecode, len(a)] for name, a in arrays]}
+        with open(path, "wb") as file:
+            file.write(MAGIC)
+            file.write(json.dumps(header).encode() + b"\n")
+            for _, a in arrays:
+                a.tofile(file)
+            file.write(blob)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            if file.readline() != MAGIC:
+                raise ValueError(f"{path} is not a saved KeywordMatcher")
+            header = json.loads(file.readline())
+            arrays = {}
+            for name, typecode, count in header["arrays"]:
+                arrays[name] = array(typecode)
+                arrays[name].fromfile(file, count)
+                if header["byteorder"] != sys.byteorder:
+                    arrays[name].byteswap()
+            blob = file.read(header["blob"])
+        matcher = cls(header["ignore_case"], header["whole_words"])
+        matcher.labels = header["labels"]
+        offsets = arrays.pop("offsets")
+        matcher.keywords = [blob[a:b] for a, b in zip(offsets, offsets[1:])]
+        matcher.goto = dict(zip(arrays.pop("goto_keys"), arrays.pop("goto_values")))
+        for name, a in arrays.items():
+            setattr(matcher, name, a)
+        matcher.branches = None
+        return matcher
+
+    def _bounded(self, buffer, keyword, begin, stop, start, end):
+        if begin > start and keyword[0] in WORD and buffer[begin - 1] in WORD:
+            return False
+        return not (stop < end and keyword[-1] in WORD and buffer[stop] in WORD)
+
+    def scan_range(self, buffer, start, end):
+        """Yields a Match for every keyword occurrence in buffer[start:end]
+        (bytes, mmap), in order of where they end; type is the keyword's
+        label and value the keyword as it was added."""
+        if self.fail is None:
+            self.finish()
+        single, child, goto, fail = self.single, self.child, self.goto, self.fail
+        hits, link, output = self.hits, self.link, self.output
+        node = 0
+        # A block at a time, carrying the state over, so that mmaps are not
+        # copied whole and keywords across block edges are still found.
+        for block in range(start, end, BLOCK_SIZE):
+            data = buffer[block:min(block + BLOCK_SIZE, end)]
+            if self.ignore_case:
+                data = data.lower()
+            for i, byte in enumerate(data):
+                while True:
+                    edge = single[node]
+                    if edge == byte:
+                        node = child[node]
+                        break
+                    if edge == MULTI:
+                        target = goto.get(node << 8 | byte)
+                        if target is not None:
+                            node = target
+                            break
+                    if not node:
+                        break
+                    node = fail[node]
+                found = hits[node]
+                while found:
+                    index = output[found]
+                    keyword = self.keywords[index]
+                    stop = block + i + 1
+                    begin = stop - len(keyword)
+                    if not self.whole_words or self._bounded(buffer, keyword, begin, stop,
+                                                             start, end):
+                        yield Match(self.labels[self.label_of[index]], keyword, begin, stop)
+                    found = link[found]
+
+    def scan(self, text, offset=0):
+        """Like scan_range() over all of text. str is matched as UTF-8 and
+        gives str values and character positions; bytes give bytes."""
+        if not isinstance(text, str):
+            for match in self.scan_range(text, 0, len(text)):
+                yield match._replace(start=offset + match.start, end=offset + match.end)
+            return
+        data = text.encode()
+        ascii = len(data) == len(text)
+        for match in self.scan_range(data, 0, len(data)):
+            start, end = match.start, match.end
+            if not ascii:
+                start = len(data[:start].decode())
+                end = start + len(match.value.decode())
+            yield Match(match.type, match.value.decode(), offset + start, offset + end)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Aho-Corasick blocklist matcher")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build an automaton and save it")
+    build.add_argument("output", help="file to save the automaton to")
+    build.add_argument("sources", nargs="+", metavar="[LABEL=]FILE",
+                       help="keyword file, one per line; LABEL defaults to the file name")
+    build.add_argument("-i", "--ignore-case", action="store_true")
+    build.add_argument("--substrings", action="store_true",
+                       help="also match keywords inside longer words")
+    scan = commands.add_parser("scan", help="scan files with a saved automaton")
+    scan.add_argument("automaton")
+    scan.add_argument("files", nargs="+")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "build":
+        sources = [source.split("=", 1) if "=" in source
+                   else (os.path.splitext(os.path.basename(source))[0], source)
+                   for source in args.sources]
+        started = time.perf_counter()
+        matcher = KeywordMatcher.build(sources, args.ignore_case, not args.substrings)
+        matcher.save(args.output)
+        print(f"{len(matcher)} keywords, {len(matcher.output)} nodes, "
+              f"built in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    else:
+        matcher = KeywordMatcher.load(args.automaton)
+        for path in args.files:
+            if os.path.getsize(path) == 0:
+                continue
+            with open(path, "rb") as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for match in matcher.scan_range(buffer, 0, len(buffer)):
+                    print(f"{path}:{match.start}  {match.type:<14} "
+                          f"{match.value.decode('latin-1')}")
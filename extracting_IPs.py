@@ -1,3 +1,8 @@
+import re
+import sys
+
+import numpy as np
+
 adress = "192.223.xx.xx"
 
 #extract the firt 3 characters of the adress
@@ -12,4 +17,134 @@ IP = ["199.233.xx.xx","111.234.xx.xx","128.235.xx.xx","178.236.xx.xx"]
 networks = []
 for adress in IP:
     networks.append(adress[0:3])
-print(networks)
\ No newline at end of file
+print(networks)
+
+# Slicing the string only works when every first octet has 3 digits
+# ("10.0.0.1"[0:3] is "10."), and the first octet is not a network anyway.
+# An IPv4 address is really a 32-bit number: a.b.c.d is
+# a*2**24 + b*2**16 + c*2**8 + d. Its network for a prefix length p
+# (the "/24" in 192.168.1.0/24) is the number with all but the top p bits
+# set to 0, i.e. address & mask. With NumPy this is done for millions of
+# addresses at once instead of one string at a time.
+
+IPV4 = re.compile(rb"\b(?:\d{1,3}\.){3}\d{1,3}\b")
+
+
+def parse_ipv4(addresses, drop_invalid=False):
+    """Dotted quads (str or bytes) -> uint32 array. Octets over 255 raise
+    ValueError, or with drop_invalid leave that address out (log lines
+    hold things like version numbers that look like addresses)."""
+    addresses = list(addresses)
+    if not addresses:
+        return np.zeros(0, dtype=np.uint32)
+    if isinstance(addresses[0], str):
+        text = "\n".join(addresses).encode()
+    else:
+        text = b"\n".join(addresses)
+    # Only digits and separators, which np.fromstring() would otherwise
+    # skip or stop at ("1.2.3.+4", " 1.2.3.4", "1.2.3. 4"). Every address
+    # must hold exactly three dots: the dots and newlines of the joined
+    # text have to run ". . . \n . . . \n ...".
+    chars = np.frombuffer(text, dtype=np.uint8)
+    is_separator = (chars == ord(".")) | (chars == ord("\n"))
+    if not (is_separator | ((chars >= ord("0")) & (chars <= ord("9")))).all():
+        raise ValueError("not a list of dotted-quad IPv4 addresses")
+    separators = np.append(chars[is_separator], ord("\n"))
+    if (len(separators) != 4 * len(addresses)
+            or (separators.reshape(-1, 4) != np.frombuffer(b"...\n", dtype=np.uint8)).any()):
+        raise ValueError("not a list of dotted-quad IPv4 addresses")
+    # One C-level pass over "a.b.c.d.a.b.c.d...": every number, in order.
+    octets = np.fromstring(text.replace(b"\n", b"."), dtype=np.int64, sep=".")
+    if len(octets) != 4 * len(addresses):
+        raise ValueError("not a list of dotted-quad IPv4 addresses")
+    octets = octets.reshape(-1, 4)
+    valid = (octets <= 255).all(axis=1)
+    if not valid.all():
+        if not drop_invalid:
+            raise ValueError("IPv4 octet over 255")
+        octets = octets[valid]
+    return ((octets[:, 0] << 24) | (octets[:, 1] << 16)
+            | (octets[:, 2] << 8) | octets[:, 3]).astype(np.uint32)
+
+
+def to_dotted(ips):
+    ips = np.asarray(ips, dtype=np.uint32)
+    octets = np.stack([(ips >> shift) & 255 for shift in (24, 16, 8, 0)], axis=1)
+    return [".".join(map(str, row)) for row in octets.tolist()]
+
+
+def mask(prefix):
+    # prefix 24 -> 0xFFFFFF00; prefix 0 -> 0.
+    return np.uint32((0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF)
+
+
+def runs(ips):
+    # ips sorted, then where each run of equal values starts. Sorting by
+    # hand is much faster than np.unique(), which in recent NumPy hashes.
+    ips = np.sort(np.asarray(ips, dtype=np.uint32))
+    first = np.ones(len(ips), dtype=bool)
+    first[1:] = ips[1:] != ips[:-1]
+    return ips, np.flatnonzero(first)
+
+
+def distinct(ips):
+    # Sorted unique addresses.
+    ips, starts = runs(ips)
+    return ips[starts]
+
+
+def group_by_prefix(ips, prefix=24):
+    """(networks, counts): each /prefix network seen and how many of the
+    addresses fall in it, sorted by network."""
+    networks, starts = runs(np.asarray(ips, dtype=np.uint32) & mask(prefix))
+    return networks[starts], np.diff(np.append(starts, len(networks)))
+
+
+def collapse(ips, prefix=32):
+    """Fewest CIDR blocks (starts, prefixes) covering exactly the /prefix
+    networks of the addresses: 10.0.0.0/25 and 10.0.0.128/25 become
+    10.0.0.0/24, and so on up.
+    """
+    starts = distinct(np.asarray(ips, dtype=np.uint32) & mask(prefix)).astype(np.int64)
+    prefixes = np.full(len(starts), prefix, dtype=np.int8)
+    # Blocks are sorted and never overlap, so a block's buddy (the other
+    # half of the block one bit shorter) can only be right next to it.
+    # Each round merges every pair at one length; pairs at the next length
+    # can only come from merges in this one.
+    for length in range(prefix, 0, -1):
+        size = 1 << (32 - length)
+        same = (prefixes[:-1] == length) & (prefixes[1:] == length)
+        pair = same & ((starts[:-1] & size) == 0) & (starts[1:] == starts[:-1] + size)
+        if not pair.any():
+            break
+        prefixes[:-1][pair] = length - 1
+        keep = np.ones(len(starts), dtype=bool)
+        keep[1:][pair] = False
+        starts, prefixes = starts[keep], prefixes[keep]
+    return starts.astype(np.uint32), prefixes
+
+
+def cidrs(starts, prefixes):
+    return [f"{start}/{prefix}" for start, prefix in zip(to_dotted(starts), prefixes.tolist())]
+
+
+if __name__ == "__main__":
+    IP = ["199.233.10.7", "10.0.0.1", "128.235.4.20", "10.0.0.2", "10.0.0.3", "199.233.10.9"]
+    ips = parse_ipv4(IP)
+    print(dict(zip(IP, to_dotted(ips & mask(24)))))
+    networks, counts = group_by_prefix(ips, 24)
+    print(dict(zip(to_dotted(networks), counts.tolist())))
+    print(cidrs(*collapse(ips)))
+
+    # python extracting_IPs.py access.log ...: summarize every address in
+    # the logs.
+    for path in sys.argv[1:]:
+        with open(path, "rb") as file:
+            ips = parse_ipv4(IPV4.findall(file.read()), drop_invalid=True)
+        print(f"{path}: {len(ips)} addresses, {len(distinct(ips))} unique")
+        networks, counts = group_by_prefix(ips, 24)
+        top = np.argsort(-counts, kind="stable")[:10]
+        for network, count in zip(to_dotted(networks[top]), counts[top].tolist()):
+            print(f"  {network}/24  {count}")
+        starts, prefixes = collapse(ips)
+        print(f"  covered by {len(starts)} CIDR blocks, e.g. {cidrs(starts[:5], prefixes[:5])}")
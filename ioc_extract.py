@@ -0,0 +1,170 @@
+import argparse
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+from blocklist import KeywordMatcher
+from ioc_scanner import IOCScanner, MAX_LINE, PRIORITY
+
+# Streaming IOC extraction: reads log files (or stdin) line by line, finds
+# every indicator with ioc_scanner.IOCScanner and writes one JSON line per
+# unique indicator:
+#
+#   {"type": "ipv4", "value": "10.0.0.5", "count": 42,
+#    "first_seen": "auth.log:17", "last_seen": "auth.log:90211"}
+#
+#   python ioc_extract.py /var/log/auth.log access.log -o iocs.jsonl
+#   zcat old.log.gz | python ioc_extract.py -t ipv4,email
+#   python ioc_extract.py --blocklist blocked.acbl access.log    (see blocklist.py)
+#
+# Each stage is a generator (lines -> matches -> store), so the input is
+# never held in memory. The set of unique indicators is: up to
+# --memory entries are counted in a dict; beyond that the counts are
+# merged into an SQLite file on disk and the dict starts over, so memory
+# stays bounded however many distinct indicators there are.
+
+MEMORY_ENTRIES = 200_000
+
+
+class IndicatorStore:
+    """(type, value) -> count, first and last location, spilling to SQLite."""
+
+    def __init__(self, max_entries=MEMORY_ENTRIES, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = {}       # (type, value) -> [count, first_seq, first, last]
+        self.seq = 0
+        self.db = None
+        self.db_path = None
+        self.spills = 0
+
+    def add(self, kind, value, where):
+        self.seq += 1
+        entry = self.entries.get((kind, value))
+        if entry is None:
+            self.entries[(kind, value)] = [1, self.seq, where, where]
+            if len(self.entries) >= self.max_entries:
+                self.spill()
+        else:
+            entry[0] += 1
+            entry[3] = where
+
+    def _open(self):
+        fd, self.db_path = tempfile.mkstemp(prefix="iocs-", suffix=".sqlite",
+                                            dir=self.directory)
+        os.close(fd)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE iocs (
+                type TEXT, value TEXT, count INTEGER, first_seq INTEGER,
+                first_seen TEXT, last_seen TEXT,
+                PRIMARY KEY (type, value)
+            ) WITHOUT ROWID;
+        """)
+
+    def spill(self):
+        if self.db is None:
+            self._open()
+        # Entries spilled later always hold later sightings, so an existing
+        # row keeps its first_seen and takes the new last_seen.
+        self.db.executemany("""
+            INSERT INTO iocs VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (type, value) DO UPDATE SET
+                count = count + excluded.count, last_seen = excluded.last_seen
+        """, ((kind, value, *entry) for (kind, value), entry in self.entries.items()))
+        self.db.commit()
+        self.entries.clear()
+        self.spills += 1
+
+    def __iter__(self):
+        # Everything, in order of first sighting.
+        if self.db is None:
+            for (kind, value), (count, _, first, last) in sorted(
+                    self.entries.items(), key=lambda item: item[1][1]):
+                yield kind, value, count, first, last
+            return
+        if self.entries:
+            self.spill()
+        yield from self.db.execute("SELECT type, value, count, first_seen, last_seen "
+                                   "FROM iocs ORDER BY first_seq")
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            os.remove(self.db_path)
+            self.db = None
+
+
+def read_lines(paths):
+    # (source name, line number, line) for every line of every input;
+    # "-" is stdin.
+    for path in paths:
+        if path == "-":
+            file = io.TextIOWrapper(sys.stdin.buffer, errors="replace")
+            name = "<stdin>"
+        else:
+            file = open(path, "r", errors="replace", buffering=1024 * 1024)
+            name = path
+        with file:
+            for number, line in enumerate(file, 1):
+                yield name, number, line
+
+
+def find_indicators(scanner, lines):
+    for name, number, line in lines:
+        for match in scanner.scan(line):
+            yield match.type, match.value, f"{name}:{number}"
+
+
+def write_jsonl(records, out):
+    written = 0
+    for kind, value, count, first, last in records:
+        out.write(json.dumps({"type": kind, "value": value, "count": count,
+                              "first_seen": first, "last_seen": last}) + "\n")
+        written += 1
+    return written
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract unique indicators of compromise as JSONL")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="log files, - for stdin")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("-t", "--types", help="comma-separated subset of: " + ", ".join(PRIORITY))
+    parser.add_argument("--memory", type=int, default=MEMORY_ENTRIES,
+                        help="unique indicators kept in memory before spilling to disk")
+    parser.add_argument("--spill-dir", help="directory for the spill database (default: $TMPDIR)")
+    parser.add_argument("--max-line", type=int, default=MAX_LINE,
+                        help="skip lines longer than this (0 = no limit)")
+    parser.add_argument("--time-budget", type=float,
+                        help="seconds of matching allowed per line before it is skipped")
+    parser.add_argument("--blocklist", help="saved keyword automaton to match as well")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    scanner = IOCScanner(args.types.split(",") if args.types else None,
+                         max_line=args.max_line, time_budget=args.time_budget,
+                         keywords=KeywordMatcher.load(args.blocklist) if args.blocklist else None)
+    store = IndicatorStore(args.memory, args.spill_dir)
+    try:
+        for kind, value, where in find_indicators(scanner, read_lines(args.inputs)):
+            store.add(kind, value, where)
+        if args.output:
+            with open(args.output, "w") as out:
+                written = write_jsonl(store, out)
+        else:
+            written = write_jsonl(store, sys.stdout)
+    finally:
+        store.close()
+    summary = f"{written} unique indicators"
+    if store.spills:
+        summary += f" ({store.spills} spills to disk)"
+    for reason, lines in scanner.skipped.items():
+        summary += f", {lines} {reason} line(s) skipped"
+    print(summary, file=sys.stderr)
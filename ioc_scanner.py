@@ -0,0 +1,337 @@
+import argparse
+import heapq
+import mmap
+import os
+import re
+import signal
+import sys
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from regex import regex_examples, sample_log
+
+# Single-pass IOC scanner built from the patterns in regex.py.
+#
+# Instead of running every pattern over the text separately (13 passes),
+# all of them are compiled into one alternation of named groups,
+# (?P<url>...)|(?P<email>...)|..., and the text is scanned once; the name
+# of the group that matched is the type of the indicator.
+#
+# At each position the alternatives are tried in PRIORITY order and the
+# first one that matches wins, so the more specific types go first: the
+# address inside "https://10.0.0.1/x" is reported as part of the url, not
+# as an ipv4, and a MAC address is not cut up into smaller pieces. Matches
+# never overlap, unlike running each pattern on its own.
+
+PRIORITY = [
+    "url",
+    "email",
+    "uuid",
+    "mac_address",
+    "log_timestamp",
+    "date",
+    "credit_card",
+    "ipv4",
+    "windows_path",
+    "unix_path",
+    "domain",
+]
+
+# Characters each type can start with. The scanner only tries the
+# alternation where one of them occurs, which skips spaces and punctuation
+# in one C-level check instead of trying every alternative there.
+START_CHARS = {
+    "url": "h",
+    "email": r"a-zA-Z0-9._%+\-",
+    "uuid": "0-9a-fA-F",
+    "mac_address": "0-9A-Fa-f",
+    "log_timestamp": "0-9",
+    "date": "0-3",
+    "credit_card": "0-9",
+    "ipv4": "0-9",
+    "windows_path": "A-Za-z",
+    "unix_path": "/",
+    "domain": "a-zA-Z0-9",
+}
+
+# strong_password is anchored (^...$): it validates a whole string rather
+# than finding things inside one. ipv4_strict matches a subset of ipv4.
+EXCLUDED = {"strong_password", "ipv4_strict"}
+
+CHUNK_SIZE = 16 * 1024 * 1024
+# Lines longer than this are skipped: some patterns take time quadratic in
+# the length of a line that almost matches (see regex_bench.py), and real
+# log lines are far shorter.
+MAX_LINE = 64 * 1024
+
+Match = namedtuple("Match", "type value start end")
+
+
+class LineTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise LineTimeout
+
+
+def build_pattern(names=None, patterns=regex_examples):
+    names = names or [name for name in PRIORITY if name in patterns]
+    for name in names:
+        if re.compile(patterns[name]["pattern"]).groups:
+            raise ValueError(f"pattern {name!r} has capturing groups")
+    alternation = "|".join(f"(?P<{name}>{patterns[name]['pattern']})" for name in names)
+    if all(name in START_CHARS for name in names):
+        start = "".join(sorted({START_CHARS[name] for name in names}))
+        alternation = f"(?=[{start}])(?:{alternation})"
+    return alternation
+
+
+class IOCScanner:
+    """Scans str, or with binary=True bytes-like objects (bytes, mmap), for
+    every type at once. In binary mode values are bytes and positions are
+    byte offsets; nothing is ever decoded.
+
+    With prefilter (the default) the text is taken a line at a time, and a
+    line is only run through the patterns whose "literals" (see regex.py)
+    it contains; lines with none of them never reach the regex engine.
+
+    Two guards keep one hostile line from stalling a scan: lines longer than
+    max_line are skipped, and with time_budget (seconds) a line whose
+    matching takes longer is abandoned, using SIGALRM, so the scanner must
+    then be used from the main thread on Unix (which includes the
+    extract_file() workers). Skipped lines are counted in self.skipped.
+
+    keywords, a blocklist.KeywordMatcher, adds its keyword matches to the
+    regex ones (the guards do not apply: it is linear in the input).
+    """
+
+    def __init__(self, names=None, patterns=regex_examples, flags=0, binary=False,
+                 prefilter=True, max_line=MAX_LINE, time_budget=None, keywords=None):
+        self.names = names or [name for name in PRIORITY if name in patterns]
+        self.patterns = patterns
+        self.flags = flags
+        self.binary = binary
+        self.prefilter = prefilter
+        self.max_line = max_line
+        self.time_budget = time_budget
+        self.keywords = keywords
+        self.skipped = Counter()        # reason ("long" / "slow") -> lines
+        self.regex = self._compile(self.names)
+        if time_budget:
+            if not hasattr(signal, "setitimer"):
+                raise ValueError("time_budget needs signal.setitimer (Unix)")
+            signal.signal(signal.SIGALRM, _on_alarm)     # ValueError off the main thread
+
+        encode = (lambda text: text.encode()) if binary else (lambda text: text)
+        self.newline = encode("\n")
+        self.literals = {}
+        for name in self.names:
+            literals = patterns[name].get("literals")
+            self.literals[name] = [encode(lit) for lit in literals] if literals else None
+        self.all_literals = sorted({lit for literals in self.literals.values() if literals
+                                    for lit in literals})
+        # frozenset of literals present in a line -> alternation of the
+        # patterns that can match there (None: nothing can).
+        self.subsets = {}
+
+    def _compile(self, names):
+        pattern = build_pattern(names, self.patterns)
+        return re.compile(pattern.encode() if self.binary else pattern, self.flags)
+
+    def _regex_for(self, present):
+        regex = self.subsets.get(present, False)
+        if regex is False:
+            names = [name for name in self.names
+                     if self.literals[name] is None
+                     or any(lit in present for lit in self.literals[name])]
+            # Dropping patterns that cannot match anywhere in the line does
+            # not change what the others match.
+            regex = self.subsets[present] = self._compile(names) if names else None
+        return regex
+
+    def _timed(self, regex, buffer, start, stop):
+        # All matches of the line, or None if they took over time_budget.
+        try:
+            signal.setitimer(signal.ITIMER_REAL, self.time_budget)
+            try:
+                return list(regex.finditer(buffer, start, stop))
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        except LineTimeout:
+            return None
+
+    def _finditer(self, buffer, start, end):
+        if not (self.prefilter or self.max_line or self.time_budget):
+            yield from self.regex.finditer(buffer, start, end)
+            return
+        find = buffer.find
+        while start < end:
+            stop = find(self.newline, start, end)
+            stop = end if stop == -1 else stop + 1
+            line_start, start = start, stop
+            if self.max_line and stop - line_start > self.max_line:
+                self.skipped["long"] += 1
+                continue
+            regex = self.regex
+            if self.prefilter:
+                present = frozenset(lit for lit in self.all_literals
+                                    if find(lit, line_start, stop) != -1)
+                regex = self._regex_for(present)
+                if regex is None:
+                    continue
+            if self.time_budget:
+                matches = self._timed(regex, buffer, line_start, stop)
+                if matches is None:
+                    self.skipped["slow"] += 1
+                    continue
+                yield from matches
+            else:
+                yield from regex.finditer(buffer, line_start, stop)
+
+    def scan(self, text, offset=0):
+        """Yields a Match for every indicator in text, in order.
+
+        offset is added to the positions, for text that is a slice of a
+        larger stream.
+        """
+        matches = (Match(m.lastgroup, m.group(), offset + m.start(), offset + m.end())
+                   for m in self._finditer(text, 0, len(text)))
+        if self.keywords is not None:
+            matches = self._merge(matches, self.keywords.scan(text, offset))
+        yield from matches
+
+    def scan_range(self, buffer, start, end):
+        # Like scan(), over buffer[start:end] without copying it out.
+        matches = (Match(m.lastgroup, m.group(), m.start(), m.end())
+                   for m in self._finditer(buffer, start, end))
+        if self.keywords is not None:
+            matches = self._merge(matches, self.keywords.scan_range(buffer, start, end))
+        yield from matches
+
+    @staticmethod
+    def _merge(matches, keyword_matches):
+        # Both come in order of where they end (regex matches never overlap),
+        # so merging on that keeps the output in order.
+        return heapq.merge(matches, keyword_matches, key=lambda match: match.end)
+
+    def scan_file(self, path, block_size=1024 * 1024):
+        # Reads whole lines in blocks, so no indicator is cut in two and
+        # memory stays at one block; positions are characters from the start
+        # of the file.
+        offset = 0
+        with open(path, "r", errors="replace") as file:
+            while True:
+                lines = file.readlines(block_size)
+                if not lines:
+                    return
+                block = "".join(lines)
+                yield from self.scan(block, offset)
+                offset += len(block)
+
+
+def chunk_bounds(buffer, chunk_size=CHUNK_SIZE):
+    # (start, end) pairs covering buffer, each ending just after a newline
+    # (or at the end), so no line is split between two chunks.
+    start, size = 0, len(buffer)
+    while start < size:
+        end = buffer.find(b"\n", min(start + chunk_size, size) - 1)
+        end = size if end == -1 else end + 1
+        yield start, end
+        start = end
+
+
+_worker_scanner = None
+
+
+def _init_worker(names, options, blocklist):
+    global _worker_scanner
+    # Each worker loads the saved automaton itself: far cheaper than
+    # pickling a built one over to it.
+    keywords = None
+    if blocklist:
+        from blocklist import KeywordMatcher
+        keywords = KeywordMatcher.load(blocklist)
+    _worker_scanner = IOCScanner(names, binary=True, keywords=keywords, **options)
+
+
+def _scan_chunk(args):
+    # Runs in a pool process: maps the file itself (only the pages of this
+    # chunk get read) and returns the chunk's unique matches, first
+    # occurrence first, and the lines skipped by the guards.
+    path, start, end = args
+    _worker_scanner.skipped.clear()
+    with open(path, "rb") as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        first = {}
+        for match in _worker_scanner.scan_range(buffer, start, end):
+            first.setdefault((match.type, match.value), match)
+        return list(first.values()), _worker_scanner.skipped
+
+
+def extract_file(path, names=None, jobs=None, chunk_size=CHUNK_SIZE, skipped=None,
+                 blocklist=None, **options):
+    """Returns the unique indicators in the file at path, in order of first
+    occurrence, each as the Match of that occurrence.
+
+    The file is memory-mapped and split into newline-aligned chunks which
+    are scanned in bytes mode by a pool of `jobs` processes. options are
+    passed on to IOCScanner; lines skipped by its guards are added to the
+    `skipped` Counter, if given. blocklist is the path of a saved
+    blocklist.KeywordMatcher whose keywords are reported as well.
+    """
+    if os.path.getsize(path) == 0:
+        return []
+    with open(path, "rb") as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        chunks = [(path, start, end) for start, end in chunk_bounds(buffer, chunk_size)]
+    seen = {}
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(names, options, blocklist)) as pool:
+        # map() hands back the chunks in file order, so merging them in
+        # turn keeps the first occurrence of every indicator.
+        for matches, chunk_skipped in pool.map(_scan_chunk, chunks):
+            if skipped is not None:
+                skipped.update(chunk_skipped)
+            for match in matches:
+                seen.setdefault((match.type, match.value), match)
+    return list(seen.values())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Single-pass IOC scanner")
+    parser.add_argument("files", nargs="*", help="log files (default: regex.py's sample_log)")
+    parser.add_argument("-t", "--types", help="comma-separated subset of: " + ", ".join(PRIORITY))
+    parser.add_argument("-j", "--jobs", type=int, help="processes scanning chunks in parallel")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="run the regexes on every line, even ones without their literals")
+    parser.add_argument("--max-line", type=int, default=MAX_LINE,
+                        help="skip lines longer than this (0 = no limit)")
+    parser.add_argument("--time-budget", type=float,
+                        help="seconds of matching allowed per line before it is skipped")
+    parser.add_argument("--blocklist", help="saved keyword automaton (see blocklist.py) "
+                                            "to match as well")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    names = args.types.split(",") if args.types else None
+    options = {"prefilter": not args.no_prefilter, "max_line": args.max_line,
+               "time_budget": args.time_budget}
+    skipped = Counter()
+    if args.files:
+        for path in args.files:
+            for match in extract_file(path, names, args.jobs, skipped=skipped,
+                                      blocklist=args.blocklist, **options):
+                print(f"{match.start:>12}  {match.type:<14} "
+                      f"{match.value.decode('latin-1')}")
+    else:
+        if args.blocklist:
+            from blocklist import KeywordMatcher
+            options["keywords"] = KeywordMatcher.load(args.blocklist)
+        scanner = IOCScanner(names, **options)
+        for match in scanner.scan(sample_log):
+            print(f"{match.start:>12}  {match.type:<14} {match.value}")
+        skipped = scanner.skipped
+    for reason, lines in skipped.items():
+        print(f"skipped {lines} {reason} line(s)", file=sys.stderr)
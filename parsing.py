@@ -1,17 +1,235 @@
-with open('login_attempts.txt', 'r') as file:
-    file_text = file.read()
-usernamames = file_text.split()
+import argparse
+import os
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from sketches import HeavyHitters
+
+LOG_FILE = 'login_attempts.txt'
+MAX_ATTEMPTS = 3
+WINDOW = 60.0           # seconds a failed attempt counts towards a lockout
+MAX_USERS = 100_000     # users tracked at once by the monitor
+POLL_INTERVAL = 0.01
+SKETCH_BATCH = 100_000  # lines counted exactly before being folded into the sketches
+
+# sshd-style lines ("Failed password for invalid user bob from 10.0.0.5 ...");
+# a line holding a single name is one attempt, like login_attempts.txt.
+# Anything else (other syslog messages: CRON, sudo, systemd-logind, ...) is
+# not a failed login.
+SSHD_FAILED = re.compile(r'Failed \S+ for (?:invalid user )?(\S+) from (\S+)')
+
+
+def count_logins(path):
+    # Reads the log once, line by line, so only the per-user counts are kept
+    # in memory however large the file is. Lines are parsed as in
+    # sketch_logins() and monitor(), so all three count the same attempts.
+    counts = Counter()
+    with open(path, 'r', errors='replace', buffering=1024 * 1024) as file:
+        counts.update(user for user in map(parse_user, file) if user is not None)
+    return counts
+
+
+def locked_users(counts, max_attempts=MAX_ATTEMPTS):
+    # Every user over the limit, from one pass over the counts.
+    return {user for user, n in counts.items() if n > max_attempts}
+
 
 def login_check(login_list, current_user):
-    counter = 0
-    for i in login_list:
-        if i == current_user:
-            counter += 1
-    if(counter > 3):
+    # login_list can be the Counter from count_logins() or a plain list of
+    # usernames, as before.
+    counts = login_list if isinstance(login_list, Counter) else Counter(login_list)
+    if(counts[current_user] > MAX_ATTEMPTS):
         return "you have tried to login more than 3 times. Your account is locked."
     else:
         return "You may access."
 
 
-resultado = login_check(usernamames, 'admin')
-print(resultado)
\ No newline at end of file
+def parse_attempt(line):
+    # (username, source address or None) of a failed login line, or None for
+    # lines that are not one.
+    m = SSHD_FAILED.search(line)
+    if m:
+        return m.group(1), m.group(2)
+    fields = line.split()
+    if len(fields) != 1:
+        return None     # other sshd or syslog messages, blank lines
+    return fields[0], None
+
+
+def parse_user(line):
+    attempt = parse_attempt(line)
+    return attempt[0] if attempt else None
+
+
+def sketch_logins(path, top=100, epsilon=0.001, delta=0.01):
+    # Approximate counterpart of count_logins() for logs with too many
+    # distinct users and sources to count exactly: memory is fixed by
+    # top/epsilon/delta. Returns (users, sources) HeavyHitters.
+    users = HeavyHitters(top, epsilon, delta)
+    sources = HeavyHitters(top, epsilon, delta)
+    batch_users, batch_sources = Counter(), Counter()
+    with open(path, 'r', errors='replace', buffering=1024 * 1024) as file:
+        for n, line in enumerate(file, 1):
+            attempt = parse_attempt(line)
+            if attempt:
+                batch_users[attempt[0]] += 1
+                if attempt[1]:
+                    batch_sources[attempt[1]] += 1
+            # The same names repeat a lot: count a batch exactly first, so
+            # each distinct name is hashed into the sketch once per batch.
+            if n % SKETCH_BATCH == 0:
+                users.update(batch_users)
+                sources.update(batch_sources)
+                batch_users.clear()
+                batch_sources.clear()
+    users.update(batch_users)
+    sources.update(batch_sources)
+    return users, sources
+
+
+def sketch_shards(paths, top=100, epsilon=0.001, delta=0.01, jobs=None):
+    # Sketches each file in its own process and merges the results.
+    with ProcessPoolExecutor(jobs) as pool:
+        shards = list(pool.map(partial(sketch_logins, top=top, epsilon=epsilon, delta=delta),
+                               paths))
+    users, sources = shards[0]
+    for shard_users, shard_sources in shards[1:]:
+        users.merge(shard_users)
+        sources.merge(shard_sources)
+    return users, sources
+
+
+def follow(path, from_start=False, poll=POLL_INTERVAL):
+    # Yields lines as they are appended to path, like `tail -F`: survives the
+    # file being truncated or rotated (replaced by a new file).
+    file = open(path, 'r', errors='replace')
+    if not from_start:
+        file.seek(0, os.SEEK_END)
+    partial = ''
+    try:
+        while True:
+            line = file.readline()
+            if line:
+                if not line.endswith('\n'):
+                    partial += line     # the writer has not finished this line
+                    continue
+                yield partial + line
+                partial = ''
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                st = None
+            if st is not None and (st.st_ino != os.fstat(file.fileno()).st_ino
+                                   or st.st_size < file.tell()):
+                file.close()
+                file = open(path, 'r', errors='replace')
+                partial = ''
+                continue
+            time.sleep(poll)
+    finally:
+        file.close()
+
+
+class LockoutMonitor:
+    """Sliding-window attempt counter per user.
+
+    Each user has a deque of attempt times inside the window. Users are kept
+    in least-recently-seen order, so idle ones are dropped from the front as
+    their window runs out, and at most max_users are tracked at all.
+    """
+
+    def __init__(self, window=WINDOW, max_attempts=MAX_ATTEMPTS, max_users=MAX_USERS):
+        self.window = window
+        self.max_attempts = max_attempts
+        self.max_users = max_users
+        self.users = OrderedDict()      # user -> deque of attempt times
+        self.evicted = 0
+
+    def _expire(self, now):
+        cutoff = now - self.window
+        while self.users:
+            user, attempts = next(iter(self.users.items()))
+            if attempts[-1] > cutoff and len(self.users) <= self.max_users:
+                break
+            self.users.popitem(last=False)
+            self.evicted += 1
+
+    def add(self, user, now=None):
+        """Records an attempt; returns the attempt count if it starts a lockout."""
+        now = time.monotonic() if now is None else now
+        attempts = self.users.get(user)
+        if attempts is None:
+            attempts = self.users[user] = deque()
+        else:
+            self.users.move_to_end(user)
+        attempts.append(now)
+        cutoff = now - self.window
+        while attempts[0] <= cutoff:
+            attempts.popleft()
+        self._expire(now)
+        # Report the crossing only, not every attempt after it.
+        if len(attempts) == self.max_attempts + 1:
+            return len(attempts)
+        return None
+
+
+def monitor(path, window=WINDOW, max_attempts=MAX_ATTEMPTS, from_start=False):
+    lockouts = LockoutMonitor(window, max_attempts)
+    for line in follow(path, from_start):
+        user = parse_user(line)
+        if user is None:
+            continue
+        count = lockouts.add(user)
+        if count:
+            print(f"{time.strftime('%H:%M:%S')} LOCKOUT {user}: "
+                  f"{count} attempts in the last {window:g}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Login attempt checker')
+    parser.add_argument('logs', nargs='*', default=[LOG_FILE])
+    parser.add_argument('-f', '--follow', action='store_true',
+                        help='watch the log as it grows and report lockouts live')
+    parser.add_argument('--window', type=float, default=WINDOW,
+                        help='seconds attempts count towards a lockout (follow mode)')
+    parser.add_argument('--from-start', action='store_true',
+                        help='follow mode: also replay the lines already in the log')
+    parser.add_argument('--approx', action='store_true',
+                        help='fixed-memory estimates of the most-attempted accounts and sources')
+    parser.add_argument('--top', type=int, default=10, help='approx mode: entries to report')
+    parser.add_argument('--epsilon', type=float, default=0.001,
+                        help='approx mode: counts are high by at most epsilon * total')
+    parser.add_argument('--delta', type=float, default=0.01,
+                        help='approx mode: probability of exceeding that bound')
+    parser.add_argument('-j', '--jobs', type=int, help='approx mode: files sketched in parallel')
+    args = parser.parse_args()
+
+    if args.follow:
+        try:
+            monitor(args.logs[0], args.window, from_start=args.from_start)
+        except KeyboardInterrupt:
+            pass
+    elif args.approx:
+        # Track more candidates than are printed, so the tail of the list is
+        # not made of recycled slots.
+        users, sources = sketch_shards(args.logs, max(100, args.top * 10), args.epsilon,
+                                       args.delta, args.jobs)
+        print(f"{users.total} attempts, estimates high by at most {users.error_bound()} "
+              f"with probability {1 - args.delta:g}")
+        for title, hitters in (("Most-attempted accounts", users), ("Top sources", sources)):
+            if hitters.total:
+                print(f"{title}:")
+                for item, count in hitters.top(args.top):
+                    print(f"  {item:<30} ~{count}")
+    else:
+        usernamames = Counter()
+        for log in args.logs:
+            usernamames.update(count_logins(log))
+
+        resultado = login_check(usernamames, 'admin')
+        print(resultado)
+        print("Locked accounts:", sorted(locked_users(usernamames)))
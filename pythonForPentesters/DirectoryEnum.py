@@ -1,17 +1,353 @@
-import requests
+import argparse
+import hashlib
+import posixpath
+import queue
+import re
+import secrets
 import sys
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+import probelog
+from httpclient import Client, RateLimiter
+
+WORDLIST = "DiretoryEnum.txt"
+
+# Only this much of a body is ever downloaded; enough to fingerprint error pages.
+PROBE_BYTES = 4096
+CALIBRATION_PROBES = 3
+LENGTH_TOLERANCE = 32
+DIR_SUFFIX = "/"
+DEFAULT_EXTENSIONS = [".html"]
+
+
+def normalize(text, word, path=None):
+    # Error pages and redirects often echo the requested path (or just the
+    # word) back; take it out so pages for different words still compare
+    # equal. The whole path goes first: in /admin/admin.html replacing only
+    # the word would also hit the directory name.
+    if path:
+        text = text.replace(path, "{path}")
+    return text.replace(word, "{word}") if word else text
+
+
+def normalize_url(url):
+    # Key for the visited set: http://Host:80//a/./b/../c -> http://host/a/c/
+    parts = urlsplit(url)
+    netloc = parts.netloc.lower()
+    default_port = {"http": ":80", "https": ":443"}.get(parts.scheme.lower())
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    path = posixpath.normpath(re.sub(r"/+", "/", parts.path or "/"))
+    if not path.endswith("/"):
+        path += "/"
+    return urlunsplit((parts.scheme.lower(), netloc, path, "", ""))
+
+
+def parse_extensions(text):
+    # ".php,bak,none" -> [".php", ".bak", ""]
+    extensions = []
+    for ext in text.split(","):
+        ext = ext.strip()
+        if ext.lower() in ("", "none"):
+            ext = ""
+        elif not ext.startswith("."):
+            ext = "." + ext
+        if ext not in extensions:
+            extensions.append(ext)
+    return extensions
+
+
+class DirEnumerator:
+    def __init__(self, domain, concurrency=20, timeout=5.0, extensions=None, scheme="http",
+                 method="GET", max_depth=0, limiter=None, retries=2):
+        self.base_url = f"{scheme}://{domain}/"
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.method = method.upper()
+        self.max_depth = max_depth
+        # One pooled, keep-alive client shared by every worker: connections (and
+        # TLS handshakes) are reused instead of being opened per wordlist entry.
+        # `limiter` is an httpclient.RateLimiter, possibly shared between hosts.
+        self.session = Client(concurrency, retries, timeout=timeout, limiter=limiter)
+
+        # Every word is tried with each suffix; directories ("/") only matter
+        # when recursing.
+        self.suffixes = list(extensions or DEFAULT_EXTENSIONS)
+        if max_depth > 0:
+            self.suffixes.append(DIR_SUFFIX)
+
+        # directory URL -> suffix -> status -> {"lengths": [min, max],
+        # "digests": set(), "locations": set()}, built from paths that cannot
+        # exist (see calibrate()). Kept per directory: a catch-all page or
+        # redirect usually differs between /x and /admin/x.
+        self.fingerprints = {}
+        self.calibrated = False
+        self.found = []
+        self.requests_sent = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+        # BFS state: directories waiting to be scanned, everything already
+        # queued (by normalized URL) and the number of probes in flight.
+        self.cond = threading.Condition(self.lock)
+        self.pending_dirs = deque()
+        self.visited = set()
+        self.in_flight = 0
+
+    def probe(self, url, word):
+        """Returns (status, length, digest, location) or None on a network error.
+
+        Uses HEAD or a streamed GET that stops after PROBE_BYTES, so large
+        pages are never downloaded just to be thrown away.
+        """
+        try:
+            r = self.session.request(self.method, url, allow_redirects=False, stream=True)
+            length = r.headers.get("Content-Length")
+            length = int(length) if length and length.isdigit() else None
+            body = b""
+            if self.method != "HEAD":
+                if length is not None and length <= PROBE_BYTES:
+                    body = r.content        # small: read it all, connection goes back to the pool
+                else:
+                    body = next(r.iter_content(PROBE_BYTES), b"")
+                    if length is None and len(body) < PROBE_BYTES:
+                        length = len(body)
+            r.close()
+        except requests.RequestException:
+            with self.lock:
+                self.errors += 1
+            return None
+        with self.lock:
+            self.requests_sent += 1
+
+        path = urlsplit(url).path
+        digest = None
+        if body:
+            body = body.replace(path.encode(), b"{path}").replace(word.encode(), b"{word}")
+            digest = hashlib.sha1(body).hexdigest()
+        location = normalize(r.headers.get("Location", ""), word, path)
+        return r.status_code, length, digest, location
+
+    def calibrate(self, dir_url=None):
+        """Fingerprints the responses for paths that cannot exist (soft 404s)
+        in the directory dir_url (default: the site root)."""
+        dir_url = dir_url or self.base_url
+        by_suffix = {}
+        for suffix in self.suffixes:
+            fingerprints = by_suffix[suffix] = {}
+            for _ in range(CALIBRATION_PROBES):
+                token = secrets.token_hex(8)
+                result = self.probe(dir_url + token + suffix, token)
+                if result is None:
+                    continue
+                status, length, digest, location = result
+                if status == 404:
+                    continue
+                fp = fingerprints.setdefault(
+                    status, {"lengths": None, "digests": set(), "locations": set()})
+                if length is not None:
+                    low, high = fp["lengths"] or (length, length)
+                    fp["lengths"] = [min(low, length), max(high, length)]
+                if digest:
+                    fp["digests"].add(digest)
+                if location:
+                    fp["locations"].add(location)
+            for status, fp in fingerprints.items():
+                print(f"soft-404 fingerprint ({dir_url}*{suffix}): status {status}, "
+                      f"length {fp['lengths']}, {len(fp['digests'])} body hash(es), "
+                      f"redirects {sorted(fp['locations'])}")
+        # Complete before any word of the directory is queued, so workers
+        # never see it half built.
+        self.fingerprints[dir_url] = by_suffix
+        return by_suffix
+
+    def is_valid(self, result, suffix, dir_url=None):
+        status, length, digest, location = result
+        if status == 404:
+            return False
+        fp = self.fingerprints.get(dir_url or self.base_url, {}).get(suffix, {}).get(status)
+        if fp is None:
+            return True
+        if location:
+            # A redirect somewhere other than the catch-all target is real
+            # (e.g. /admin -> /admin/).
+            return location not in fp["locations"]
+        if digest:
+            if digest in fp["digests"]:
+                return False
+            if len(fp["digests"]) == 1:
+                # The catch-all page is static and this body differs from it.
+                return True
+        # HEAD, or a dynamic catch-all page: fall back to comparing sizes.
+        if length is not None and fp["lengths"] is not None:
+            low, high = fp["lengths"]
+            return not (low - LENGTH_TOLERANCE <= length <= high + LENGTH_TOLERANCE)
+        return False
+
+    def add_directory(self, url, depth):
+        # Caller holds self.cond.
+        key = normalize_url(url)
+        if key in self.visited:
+            return
+        self.visited.add(key)
+        self.pending_dirs.append((url, depth))
+        self.cond.notify_all()
+
+    def worker(self, work):
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            dir_url, word, depth = item
+            try:
+                # Extensions are expanded here, per word, so the queue holds
+                # one entry per word however many extensions are scanned.
+                for suffix in self.suffixes:
+                    url = dir_url + word + suffix
+                    result = self.probe(url, word)
+                    if result is not None and self.is_valid(result, suffix, dir_url):
+                        with self.lock:
+                            self.found.append(url)
+                            print("Valid directory:", url)
+                            if suffix == DIR_SUFFIX and depth < self.max_depth:
+                                self.add_directory(url, depth + 1)
+            finally:
+                with self.cond:
+                    self.in_flight -= 1
+                    self.cond.notify_all()
+
+    def expand(self, dir_url, depth, words):
+        # Runs when the directory is first served, so each one is
+        # calibrated just before its words go out.
+        if self.calibrated:
+            self.calibrate(dir_url)
+        for word in words():
+            yield dir_url, word, depth
+
+    def run(self, words, calibrate=True):
+        """Scans the site root, and found directories down to max_depth.
+
+        words is an iterable, or a function returning a fresh iterable for
+        each directory (needed when recursing over a streamed wordlist).
+        """
+        if not callable(words):
+            items = list(words) if self.max_depth > 0 else words
+            words = lambda: items
+        self.calibrated = calibrate
+
+        # Bounded queue: words are expanded lazily and streamed to the
+        # workers, never held in memory as a list of pending requests.
+        work = queue.Queue(maxsize=self.concurrency * 4)
+        threads = [threading.Thread(target=self.worker, args=(work,), daemon=True)
+                   for _ in range(self.concurrency)]
+        for t in threads:
+            t.start()
+
+        with self.cond:
+            self.add_directory(self.base_url, 0)
+
+        # Directories being scanned. They are served round-robin, so a branch
+        # found at depth 1 starts right away instead of after the whole first
+        # level, while discovery order still keeps the walk breadth-first.
+        active = deque()
+        try:
+            while True:
+                with self.cond:
+                    while self.pending_dirs:
+                        dir_url, depth = self.pending_dirs.popleft()
+                        active.append(self.expand(dir_url, depth, words))
+                    if not active:
+                        if self.in_flight == 0:
+                            break
+                        # Wait for in-flight probes; they may find new directories.
+                        self.cond.wait(0.5)
+                        continue
+
+                branch = active.popleft()
+                exhausted = False
+                for _ in range(self.concurrency):
+                    item = next(branch, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    with self.cond:
+                        self.in_flight += 1
+                    work.put(item)
+                if not exhausted:
+                    active.append(branch)
+        finally:
+            for _ in threads:
+                work.put(None)
+            for t in threads:
+                t.join()
+        return self.found
+
+
+def read_words(path):
+    with open(path) as file:
+        for line in file:
+            word = line.strip()
+            if word:
+                yield word
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Directory enumerator")
+    parser.add_argument("domain", nargs="+", help="one or more hosts, scanned in parallel")
+    parser.add_argument("-w", "--wordlist", default=WORDLIST)
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--https", action="store_true")
+    parser.add_argument("--head", action="store_true",
+                        help="probe with HEAD instead of a truncated GET")
+    parser.add_argument("--no-calibrate", action="store_true",
+                        help="treat every non-404 status as valid")
+    parser.add_argument("-x", "--extensions", default=",".join(DEFAULT_EXTENSIONS),
+                        help="comma-separated extensions to try per word, 'none' for bare words "
+                             "(e.g. .php,.bak,.txt,none)")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="max requests per second across all hosts (0 = unlimited)")
+    parser.add_argument("--host-rate", type=float, default=0,
+                        help="max requests per second to any one host (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="retries on connection errors and 429/502/503/504")
+    parser.add_argument("-d", "--depth", type=int, default=0,
+                        help="recurse into found directories this many levels deep")
+    probelog.add_arguments(parser)
+    return parser.parse_args()
 
-if len(sys.argv) < 2:
-    print("Usage: python DirectoryEnum.py <domain>")
-    sys.exit(1)
 
-sub_list = open("DiretoryEnum.txt").read()
-directories = sub_list.splitlines()
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python DirectoryEnum.py <domain>")
+        sys.exit(1)
+    args = parse_args()
+    probelog.configure_from_args(args)
 
-for dir in directories:
-    dir_enum = f"http://{sys.argv[1]}/{dir}.html"
-    r = requests.get(dir_enum)
-    if r.status_code == 404:
-        pass
-    else:
-        print("Valid directory:", dir_enum)
\ No newline at end of file
+    limiter = RateLimiter(args.rate, args.host_rate) if args.rate or args.host_rate else None
+    extensions = parse_extensions(args.extensions)
+    enums = [DirEnumerator(domain, args.concurrency, args.timeout, extensions,
+                           scheme="https" if args.https else "http",
+                           method="HEAD" if args.head else "GET",
+                           max_depth=args.depth, limiter=limiter, retries=args.retries)
+             for domain in args.domain]
+    threads = [threading.Thread(target=enum.run,
+                                args=(lambda: read_words(args.wordlist), not args.no_calibrate))
+               for enum in enums]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    sent = sum(enum.requests_sent for enum in enums)
+    errors = sum(enum.errors for enum in enums)
+    print(f"{sent} requests in {elapsed:.1f}s "
+          f"({sent / max(elapsed, 1e-9):.0f} req/s), {errors} errors")
+    for enum in enums:
+        print(f"{enum.base_url}: {enum.session.metrics.summary()}")
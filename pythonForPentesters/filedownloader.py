@@ -1,5 +1,381 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
 import requests
 
-url = 'https://assets.tryhackme.com/img/THMlogo.png'
-r = requests.get(url, allow_redirects=True)
-open('THMlogo.png', 'wb').write(r.content)
\ No newline at end of file
+import probelog
+from httpclient import Client
+
+URL = 'https://assets.tryhackme.com/img/THMlogo.png'
+CHUNK_SIZE = 64 * 1024
+# Files smaller than this are not worth splitting into segments.
+MIN_SEGMENT_SIZE = 1024 * 1024
+SEGMENT_RETRIES = 3
+CACHE_FILE = 'download_cache.json'
+
+# What every download returns. not_modified is True when a conditional
+# request got 304 and the local copy was kept.
+Download = namedtuple('Download', 'dest size sha256 etag last_modified not_modified')
+
+
+def default_name(url):
+    return os.path.basename(urlsplit(url).path) or 'download'
+
+
+def hash_file(path, sha, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            sha.update(chunk)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def load_validator(meta_path):
+    try:
+        with open(meta_path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def download(url, dest=None, resume=True, chunk_size=CHUNK_SIZE, session=None, timeout=30,
+             cached=None):
+    """Streams url to dest in fixed-size chunks; returns a Download.
+
+    Data goes to dest + '.part' and is renamed into place once complete, so
+    memory use is one chunk whatever the file size. An existing .part file
+    is resumed with a Range request; If-Range makes the server send the
+    whole file instead if it changed since the partial download started.
+
+    cached is an earlier Download (or its dict) for the same url: if dest
+    still exists it is revalidated with If-None-Match / If-Modified-Since
+    and kept as is on a 304.
+    """
+    session = session or Client(1, timeout=timeout)
+    dest = dest or default_name(url)
+    part = dest + '.part'
+    meta = part + '.json'
+    sha = hashlib.sha256()
+
+    offset = os.path.getsize(part) if resume and os.path.exists(part) else 0
+    # identity: byte offsets and Content-Length must refer to the bytes we
+    # write, not a compressed transfer encoding of them.
+    headers = {'Accept-Encoding': 'identity'}
+    validator = {}
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+        validator = load_validator(meta)
+        if validator.get('etag') or validator.get('last_modified'):
+            headers['If-Range'] = validator.get('etag') or validator['last_modified']
+    elif cached and os.path.exists(dest):
+        cached = dict(cached._asdict() if hasattr(cached, '_asdict') else cached)
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    with session.get(url, headers=headers, stream=True, allow_redirects=True,
+                     timeout=timeout) as r:
+        if offset and r.status_code == 416:
+            # Nothing left to fetch: the .part file already holds everything.
+            total = r.headers.get('Content-Range', '').rpartition('/')[2]
+            if total.isdigit() and int(total) == offset:
+                hash_file(part, sha, chunk_size)
+                os.replace(part, dest)
+                _remove(meta)
+                return Download(dest, offset, sha.hexdigest(), validator.get('etag'),
+                                validator.get('last_modified'), False)
+            # The .part file does not match the remote file: drop it and
+            # start over, still revalidating dest against cached.
+            r.close()
+            _remove(part)
+            _remove(meta)
+            return download(url, dest, resume=False, chunk_size=chunk_size,
+                            session=session, timeout=timeout, cached=cached)
+        if r.status_code == 304 and ('If-None-Match' in headers
+                                     or 'If-Modified-Since' in headers):
+            return Download(dest, cached.get('size'), cached.get('sha256'),
+                            r.headers.get('ETag') or cached.get('etag'),
+                            r.headers.get('Last-Modified') or cached.get('last_modified'), True)
+        r.raise_for_status()
+
+        if offset and r.status_code == 206:
+            print(f'resuming {dest} at byte {offset}')
+            hash_file(part, sha, chunk_size)
+            mode = 'ab'
+        else:
+            offset = 0      # no partial file, or the server sent it all again
+            mode = 'wb'
+            validator = {'url': url, 'etag': r.headers.get('ETag'),
+                         'last_modified': r.headers.get('Last-Modified')}
+            with open(meta, 'w') as file:
+                json.dump(validator, file)
+
+        expected = r.headers.get('Content-Length')
+        expected = offset + int(expected) if expected and expected.isdigit() else None
+
+        size = offset
+        with open(part, mode) as file:
+            for chunk in r.iter_content(chunk_size):
+                file.write(chunk)
+                sha.update(chunk)
+                size += len(chunk)
+
+    if expected is not None and size != expected:
+        raise IOError(f'{url}: got {size} of {expected} bytes, rerun to resume')
+    os.replace(part, dest)
+    _remove(meta)
+    return Download(dest, size, sha.hexdigest(), validator.get('etag'),
+                    validator.get('last_modified'), False)
+
+
+def probe_ranges(session, url, timeout=30):
+    """Returns (size, etag, last_modified); size is None without byte-range support."""
+    r = session.get(url, headers={'Range': 'bytes=0-0', 'Accept-Encoding': 'identity'},
+                    stream=True, allow_redirects=True, timeout=timeout)
+    r.close()
+    total = r.headers.get('Content-Range', '').rpartition('/')[2]
+    if r.status_code != 206 or not total.isdigit():
+        return None, None, None
+    return int(total), r.headers.get('ETag'), r.headers.get('Last-Modified')
+
+
+def split_ranges(size, segments):
+    step = -(-size // segments)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+def fetch_segment(session, url, fd, start, end, validator, chunk_size=CHUNK_SIZE,
+                  retries=SEGMENT_RETRIES, timeout=30, progress=None):
+    """Writes bytes start..end (inclusive) of url at the same offsets of fd.
+
+    A failed attempt is retried on its own, from the first byte it did not
+    get, without touching the other segments.
+    """
+    pos = start
+    for attempt in range(retries + 1):
+        headers = {'Range': f'bytes={pos}-{end}', 'Accept-Encoding': 'identity'}
+        if validator:
+            headers['If-Range'] = validator
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as r:
+                if r.status_code != 206:
+                    raise IOError(f'expected 206 for bytes {pos}-{end}, got {r.status_code}'
+                                  ' (file changed on the server?)')
+                for chunk in r.iter_content(chunk_size):
+                    os.pwrite(fd, chunk, pos)
+                    pos += len(chunk)
+                    if progress is not None:
+                        progress(len(chunk))
+            if pos > end:
+                return
+            raise IOError(f'segment {start}-{end} ended early at {pos}')
+        except (requests.RequestException, IOError) as e:
+            if attempt == retries:
+                raise
+            print(f'segment {start}-{end}: {e}; retrying from byte {pos}')
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def download_segmented(url, dest=None, segments=4, chunk_size=CHUNK_SIZE, timeout=30,
+                       retries=SEGMENT_RETRIES, rate=0):
+    """Downloads url as `segments` concurrent Range requests; returns a Download.
+
+    Each segment is written straight to its offset of a preallocated file
+    with os.pwrite. Falls back to download() when the server does not
+    support ranges or the file is too small to be worth splitting.
+    """
+    dest = dest or default_name(url)
+    # Whole-request failures (refused connections, 503s) are retried by the
+    # client; fetch_segment() retries the ones that break off mid-body.
+    # Every segment opens its own connection to the same host: resolve it once.
+    session = Client(segments, timeout=timeout, rate=rate, dns_cache=True)
+
+    size, etag, last_modified = probe_ranges(session, url, timeout)
+    validator = etag or last_modified
+    if size is None or size < 2 * MIN_SEGMENT_SIZE or not hasattr(os, 'pwrite'):
+        return download(url, dest, chunk_size=chunk_size, session=session, timeout=timeout)
+    segments = max(1, min(segments, size // MIN_SEGMENT_SIZE))
+
+    tmp = dest + '.segments'
+    fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    done = [0]
+    lock = threading.Lock()
+
+    def progress(n):
+        with lock:
+            done[0] += n
+
+    try:
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(fd, 0, size)
+        else:
+            os.ftruncate(fd, size)
+        with ThreadPoolExecutor(segments) as pool:
+            futures = [pool.submit(fetch_segment, session, url, fd, start, end, validator,
+                                   chunk_size, retries, timeout, progress)
+                       for start, end in split_ranges(size, segments)]
+            for future in futures:
+                future.result()
+    except BaseException:
+        os.close(fd)
+        _remove(tmp)
+        raise
+    os.close(fd)
+
+    if done[0] < size:
+        _remove(tmp)
+        raise IOError(f'{url}: got {done[0]} of {size} bytes')
+    # Segments finish out of order, so the digest is taken in one pass at the end.
+    sha = hashlib.sha256()
+    hash_file(tmp, sha, 1024 * 1024)
+    os.replace(tmp, dest)
+    return Download(dest, size, sha.hexdigest(), etag, last_modified, False)
+
+
+def load_cache(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path, cache):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(cache, file, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path):
+    # One "url [destination]" per line; blank lines and # comments are skipped.
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                url, _, dest = line.partition(' ')
+                yield url, dest.strip() or None
+
+
+def download_batch(entries, out_dir='.', concurrency=4, cache_path=CACHE_FILE,
+                   chunk_size=CHUNK_SIZE, timeout=30, rate=0, per_host_rate=0):
+    """Downloads (url, dest) pairs with bounded concurrency.
+
+    The ETag, Last-Modified, size and hash of every completed file are kept
+    in a JSON cache, so the next run sends conditional requests and skips
+    anything the server reports as unchanged (304). Returns
+    (downloaded, unchanged, failed) counts. rate and per_host_rate cap the
+    requests per second overall and to any one host (0: no limit).
+    """
+    cache = load_cache(cache_path)
+    lock = threading.Lock()
+    # Manifests usually list many files from a few hosts.
+    session = Client(concurrency, timeout=timeout, rate=rate, per_host_rate=per_host_rate,
+                     dns_cache=True)
+    counts = {'downloaded': 0, 'unchanged': 0, 'failed': 0}
+
+    def fetch(url, dest):
+        dest = os.path.join(out_dir, dest or default_name(url))
+        with lock:
+            cached = cache.get(url)
+        result = download(url, dest, chunk_size=chunk_size, session=session,
+                          timeout=timeout, cached=cached)
+        entry = result._asdict()
+        del entry['not_modified']
+        entry['checked'] = time.time()
+        with lock:
+            cache[url] = entry
+        return result
+
+    os.makedirs(out_dir, exist_ok=True)
+    with ThreadPoolExecutor(concurrency) as pool:
+        # Submit lazily so a huge manifest never turns into a huge list of futures.
+        pending = {}
+        entries = iter(entries)
+        while True:
+            for url, dest in entries:
+                pending[pool.submit(fetch, url, dest)] = url
+                if len(pending) >= concurrency * 2:
+                    break
+            if not pending:
+                break
+            done = next(as_completed(pending))
+            url = pending.pop(done)
+            try:
+                result = done.result()
+            except (requests.RequestException, IOError) as e:
+                counts['failed'] += 1
+                print(f'FAILED    {url}: {e}')
+                continue
+            if result.not_modified:
+                counts['unchanged'] += 1
+                print(f'unchanged {result.dest}')
+            else:
+                counts['downloaded'] += 1
+                print(f'fetched   {result.dest}: {result.size} bytes, sha256 {result.sha256}')
+            if (counts['downloaded'] + counts['unchanged']) % 50 == 0:
+                with lock:
+                    save_cache(cache_path, cache)
+    with lock:
+        save_cache(cache_path, cache)
+    return counts['downloaded'], counts['unchanged'], counts['failed']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Streaming, resumable file downloader')
+    parser.add_argument('url', nargs='?', default=URL)
+    parser.add_argument('-o', '--output', help='destination file (default: name from the URL)')
+    parser.add_argument('--no-resume', action='store_true', help='ignore any partial download')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('-s', '--segments', type=int, default=1,
+                        help='fetch large files as this many parallel Range requests')
+    parser.add_argument('-m', '--manifest',
+                        help='batch mode: file with one "url [destination]" per line')
+    parser.add_argument('-d', '--dir', default='.', help='batch mode: output directory')
+    parser.add_argument('-c', '--concurrency', type=int, default=4,
+                        help='batch mode: downloads in parallel')
+    parser.add_argument('--cache', default=CACHE_FILE,
+                        help='batch mode: ETag / Last-Modified cache file')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='batch and segmented modes: max requests per second '
+                             'across all hosts (0 = unlimited)')
+    parser.add_argument('--host-rate', type=float, default=0,
+                        help='batch mode: max requests per second to any one host '
+                             '(0 = unlimited)')
+    probelog.add_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    probelog.configure_from_args(args)
+    if args.manifest:
+        downloaded, unchanged, failed = download_batch(
+            read_manifest(args.manifest), args.dir, args.concurrency, args.cache, args.chunk_size,
+            rate=args.rate, per_host_rate=args.host_rate)
+        print(f'{downloaded} downloaded, {unchanged} unchanged, {failed} failed')
+        sys.exit(1 if failed else 0)
+    try:
+        if args.segments > 1:
+            result = download_segmented(args.url, args.output, args.segments, args.chunk_size,
+                                        rate=args.rate)
+        else:
+            result = download(args.url, args.output, not args.no_resume, args.chunk_size)
+    except (requests.RequestException, IOError) as e:
+        print(f'download failed: {e}')
+        sys.exit(1)
+    print(f'{result.dest}: {result.size} bytes, sha256 {result.sha256}')
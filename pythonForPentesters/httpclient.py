@@ -0,0 +1,272 @@
+import random
+import socket
+import threading
+import time
+from collections import Counter, OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.retry import Retry
+
+import probelog
+
+# Shared HTTP client for the web-facing tools (DirectoryEnum.py,
+# subdomainEnum.py, filedownloader.py). Everything that decides how fast and
+# how politely we hit a server lives here:
+#
+#   - a connection pool sized to the caller's concurrency (keep-alive)
+#   - optionally, a bounded DNS cache used by this client's connections only
+#   - bounded retries with exponential backoff on connection errors and
+#     429/502/503/504
+#   - a global and a per-host token-bucket rate limit
+#   - request timing metrics, and a probelog record per request
+#
+#   client = Client(pool_size=20, rate=100, per_host_rate=20)
+#   r = client.get(url)
+#   print(client.metrics.summary())
+
+DEFAULT_TIMEOUT = 10.0
+DNS_TTL = 300.0
+DNS_CACHE_SIZE = 1024
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: at most `rate` requests/s with bursts of `burst`
+    (default: a tenth of a second's worth).
+
+    One instance can be shared by several clients so they all draw from the
+    same request budget.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, self.rate / 10))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """A global bucket plus one bucket per host; either rate may be 0 (off)."""
+
+    def __init__(self, rate=0, per_host_rate=0):
+        self.bucket = TokenBucket(rate) if rate else None
+        self.per_host_rate = per_host_rate
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, host):
+        if self.per_host_rate:
+            with self.lock:
+                bucket = self.hosts.get(host)
+                if bucket is None:
+                    bucket = self.hosts[host] = TokenBucket(self.per_host_rate)
+            bucket.acquire()
+        if self.bucket is not None:
+            self.bucket.acquire()
+
+
+class Metrics:
+    """Request counters and latency (time until response headers) percentiles.
+
+    Latencies are kept in a fixed-size reservoir sample, so memory stays
+    constant however many requests are made.
+    """
+
+    def __init__(self, reservoir=10000):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.statuses = Counter()
+        self.reservoir = reservoir
+        self.samples = []
+        self.started = time.monotonic()
+
+    def record(self, elapsed, status=None):
+        with self.lock:
+            self.requests += 1
+            if status is None:
+                self.errors += 1
+            else:
+                self.statuses[status] += 1
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+            if len(self.samples) < self.reservoir:
+                self.samples.append(elapsed)
+            else:
+                i = random.randrange(self.requests)
+                if i < self.reservoir:
+                    self.samples[i] = elapsed
+
+    def percentile(self, p):
+        with self.lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+    def summary(self):
+        wall = time.monotonic() - self.started
+        mean = self.total_time / self.requests if self.requests else 0.0
+        statuses = ', '.join(f'{code}: {n}' for code, n in sorted(self.statuses.items()))
+        return (f'{self.requests} requests ({self.requests / max(wall, 1e-9):.0f}/s), '
+                f'{self.errors} errors, latency mean {mean * 1000:.1f} ms, '
+                f'p50 {self.percentile(50) * 1000:.1f} ms, p95 {self.percentile(95) * 1000:.1f} ms, '
+                f'max {self.max_time * 1000:.1f} ms [{statuses}]')
+
+
+class DNSCache:
+    """LRU cache of getaddrinfo() results: at most `size` names, each kept
+    for `ttl` seconds.
+
+    urllib3 resolves the host for every new connection; with many short
+    connections (or many hosts behind few names) that is a lookup per
+    request. Only connections made through a Client(dns_cache=...) use it;
+    socket.getaddrinfo itself is left alone.
+    """
+
+    def __init__(self, ttl=DNS_TTL, size=DNS_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self.entries = OrderedDict()    # (host, port) -> (addresses, expiry)
+        self.lock = threading.Lock()
+
+    def resolve(self, host, port):
+        key = (host, port)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(key)
+                return entry[0]
+        addresses = [info[4][0] for info in
+                     socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)]
+        with self.lock:
+            self.entries[key] = (addresses, now + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return addresses
+
+
+class CachingAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections resolve host names through a DNSCache."""
+
+    def __init__(self, dns_cache, **kwargs):
+        self.dns_cache = dns_cache      # before super(): it builds the pools
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        manager = self.poolmanager
+        manager.pool_classes_by_scheme = {
+            scheme: type(pool_cls.__name__, (pool_cls,),
+                         {'ConnectionCls': self._connection_class(pool_cls.ConnectionCls)})
+            for scheme, pool_cls in manager.pool_classes_by_scheme.items()}
+
+    def _connection_class(self, base):
+        dns_cache = self.dns_cache
+
+        class Connection(base):
+            def _new_conn(self):
+                # Connect to each cached address in turn. The name is put
+                # back afterwards, since TLS (SNI, certificate check) and
+                # the Host header still need it.
+                name = self._dns_host
+                try:
+                    addresses = dns_cache.resolve(name, self.port)
+                except socket.gaierror as e:
+                    raise NameResolutionError(name, self, e) from e
+                error = None
+                try:
+                    for address in addresses:
+                        self._dns_host = address
+                        try:
+                            return super()._new_conn()
+                        except NewConnectionError as e:
+                            error = e
+                finally:
+                    self._dns_host = name
+                raise error
+
+        Connection.__name__ = base.__name__
+        return Connection
+
+
+class Client(requests.Session):
+    """requests.Session with pooling, retries, rate limits and metrics set up.
+
+    dns_cache: True for a DNSCache of this client's own, or a DNSCache to
+    share between clients; off by default.
+    """
+
+    def __init__(self, pool_size=10, retries=2, backoff=0.3, timeout=DEFAULT_TIMEOUT,
+                 rate=0, per_host_rate=0, limiter=None, dns_cache=False):
+        super().__init__()
+        self.timeout = timeout
+        self.limiter = limiter or (RateLimiter(rate, per_host_rate)
+                                   if rate or per_host_rate else None)
+        self.metrics = Metrics()
+
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                      backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=None, raise_on_status=False,
+                      respect_retry_after_header=True)
+        # pool_block keeps the number of open connections at pool_size even if
+        # more threads than that share the client.
+        options = dict(pool_connections=max(4, pool_size), pool_maxsize=pool_size,
+                       pool_block=True, max_retries=retry)
+        if dns_cache:
+            self.dns_cache = DNSCache() if dns_cache is True else dns_cache
+            adapter = CachingAdapter(self.dns_cache, **options)
+        else:
+            self.dns_cache = None
+            adapter = HTTPAdapter(**options)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        host = ((kwargs.get('headers') or {}).get('Host') or urlsplit(url).netloc).lower()
+        if self.limiter is not None:
+            self.limiter.acquire(host)
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.RequestException as e:
+            elapsed = time.perf_counter() - start
+            self.metrics.record(elapsed)
+            probelog.record('http', host, elapsed, None, None, method=method, url=url,
+                            error=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - start
+        self.metrics.record(elapsed, response.status_code)
+        # A streamed body has not been read yet; log its announced size.
+        size = response.headers.get('Content-Length')
+        if not kwargs.get('stream'):
+            size = len(response.content)
+        elif size is not None and size.isdigit():
+            size = int(size)
+        else:
+            size = None
+        probelog.record('http', host, elapsed, response.status_code, size, method=method,
+                        url=url)
+        return response
@@ -1,9 +1,10 @@
+import argparse
 import sys
 import socket
+import time
 import pyfiglet
 
-ascii_banner = pyfiglet.figlet_format("TryHackMe \n Python 4 Pentesters \nPort Scanner")
-print(ascii_banner)
+import probelog
 
 ip = '192.168.1.6'
 open_ports = []
@@ -12,6 +13,7 @@ ports = range(1, 65535)
 
 
 def probe_port(ip, port, result=1):
+    start = time.perf_counter()
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(0.5)
@@ -19,19 +21,36 @@ def probe_port(ip, port, result=1):
         if r == 0:
             result = r
         sock.close()
+        probelog.record('tcp', f'{ip}:{port}', time.perf_counter() - start,
+                        'open' if r == 0 else 'closed')
     except Exception as e:
-        pass
+        probelog.record('tcp', f'{ip}:{port}', time.perf_counter() - start, 'error',
+                        error=type(e).__name__)
     return result
 
 
-for port in ports:
-    sys.stdout.flush()
-    response = probe_port(ip, port)
-    if response == 0:
-        open_ports.append(port)
+def parse_args():
+    parser = argparse.ArgumentParser(description='TCP connect port scanner')
+    parser.add_argument('ip', nargs='?', default=ip, help=f'target (default {ip})')
+    probelog.add_arguments(parser)
+    return parser.parse_args()
 
-if open_ports:
-    print("Open Ports are: ")
-    print(sorted(open_ports))
-else:
-    print("Looks like no ports are open :(")
+
+if __name__ == '__main__':
+    args = parse_args()
+    probelog.configure_from_args(args)
+
+    ascii_banner = pyfiglet.figlet_format("TryHackMe \n Python 4 Pentesters \nPort Scanner")
+    print(ascii_banner)
+
+    for port in ports:
+        sys.stdout.flush()
+        response = probe_port(args.ip, port)
+        if response == 0:
+            open_ports.append(port)
+
+    if open_ports:
+        print("Open Ports are: ")
+        print(sorted(open_ports))
+    else:
+        print("Looks like no ports are open :(")
@@ -0,0 +1,148 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Structured log of every probe the tools send, one JSON object per line:
+#
+#   {"ts": 1760000000.123, "kind": "http", "target": "10.10.10.5:80",
+#    "elapsed": 0.0123, "status": 404, "bytes": 153, "method": "GET", "url": "..."}
+#
+# record() only appends a dict to a deque; a background thread serializes and
+# writes the records in batches through a large file buffer and rotates the
+# file by size (probes.jsonl -> probes.jsonl.1 -> ...). If the writer ever
+# falls behind and QUEUE_SIZE records are waiting, new records are dropped
+# (and counted) rather than slowing the probes down.
+#
+# Nothing is logged until configure() is called; the CLIs do that unless
+# --no-log is given:
+#
+#   probelog.configure('probes.jsonl')
+#   probelog.record('tcp', '10.10.10.5:22', elapsed=0.01, status='open')
+
+DEFAULT_PATH = 'probes.jsonl'
+MAX_BYTES = 50 * 1024 * 1024
+BACKUPS = 3
+QUEUE_SIZE = 100_000
+FLUSH_INTERVAL = 1.0
+WRITE_BUFFER = 1024 * 1024
+BATCH_SIZE = 1000
+POLL_INTERVAL = 0.05
+
+
+class ProbeLog:
+    def __init__(self, path=DEFAULT_PATH, max_bytes=MAX_BYTES, backups=BACKUPS,
+                 queue_size=QUEUE_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        # deque.append/popleft are atomic, so producers never take a lock;
+        # the size check is approximate, which is all a drop limit needs.
+        self.pending = deque()
+        self.stopping = threading.Event()
+        self.written = 0
+        self.dropped = 0
+        self.file = open(path, 'a', buffering=WRITE_BUFFER)
+        self.thread = threading.Thread(target=self._writer, name='probelog', daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        if len(self.pending) < self.queue_size:
+            self.pending.append(record)
+        else:
+            self.dropped += 1
+
+    def _rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{i}'):
+                os.replace(f'{self.path}.{i}', f'{self.path}.{i + 1}')
+        if self.backups > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, 'a', buffering=WRITE_BUFFER)
+
+    def _write_lines(self, lines):
+        self.file.write('\n'.join(lines) + '\n')
+        self.written += len(lines)
+        if self.file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _writer(self):
+        last_flush = time.monotonic()
+        while True:
+            stopping = self.stopping.is_set()
+            # Drain everything waiting, a batch per write call.
+            lines = []
+            while True:
+                try:
+                    record = self.pending.popleft()
+                except IndexError:
+                    break
+                lines.append(json.dumps(record, separators=(',', ':'), default=str))
+                if len(lines) >= BATCH_SIZE:
+                    self._write_lines(lines)
+                    lines = []
+            if lines:
+                self._write_lines(lines)
+            now = time.monotonic()
+            if stopping or now - last_flush >= self.flush_interval:
+                self.file.flush()
+                last_flush = now
+            if stopping:
+                return
+            self.stopping.wait(POLL_INTERVAL)
+
+    def close(self):
+        self.stopping.set()
+        self.thread.join()
+        self.file.close()
+
+
+_log = None
+
+
+def configure(path=DEFAULT_PATH, **options):
+    """Starts logging every probe to path; returns the ProbeLog."""
+    global _log
+    close()
+    _log = ProbeLog(path, **options)
+    return _log
+
+
+def close():
+    """Flushes the log and stops the writer thread (also run at exit)."""
+    global _log
+    if _log is not None:
+        log, _log = _log, None
+        log.close()
+        if log.dropped:
+            print(f'probe log: {log.dropped} records dropped (writer fell behind)')
+
+
+atexit.register(close)
+
+
+def record(kind, target, elapsed=None, status=None, nbytes=None, **fields):
+    """Logs one probe; a no-op unless configure() was called."""
+    log = _log
+    if log is None:
+        return
+    log.write({'ts': time.time(), 'kind': kind, 'target': target, 'elapsed': elapsed,
+               'status': status, 'bytes': nbytes, **fields})
+
+
+def add_arguments(parser):
+    parser.add_argument('--log', default=DEFAULT_PATH, metavar='PATH',
+                        help='JSONL file every probe is recorded in')
+    parser.add_argument('--no-log', action='store_true', help='do not record probes')
+
+
+def configure_from_args(args):
+    if not args.no_log:
+        configure(args.log)
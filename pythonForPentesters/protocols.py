@@ -0,0 +1,195 @@
+import email.utils
+import ftplib
+import socket
+import time
+
+import paramiko
+import requests
+
+# Protocol backends for bruteforcing.py.
+#
+# A backend only knows how to open a connection to the target and how to try
+# one username/password pair on it. Everything else (threads, retries,
+# connection reuse, progress, the session journal) lives in the shared engine
+# in bruteforcing.py, so adding a protocol means writing connect() and
+# try_credential() and nothing more.
+#
+# try_credential() returns True/False for a definite answer from the server.
+# Any exception means "the connection is broken, try again on a fresh one",
+# except FatalError, which stops the whole run (e.g. password auth disabled).
+# RetryLater is retried like any other error, after at least `delay` seconds.
+
+RATE_LIMIT_DELAY = 5.0      # wait after a 429 that gives no Retry-After
+
+
+class FatalError(Exception):
+    pass
+
+
+class RetryLater(Exception):
+    def __init__(self, message, delay):
+        super().__init__(message)
+        self.delay = delay
+
+
+def retry_after(response, default=RATE_LIMIT_DELAY):
+    # Retry-After is either a number of seconds or an HTTP date.
+    value = response.headers.get('Retry-After', '').strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class Protocol:
+    name = 'base'
+    default_port = None
+    # How many failed attempts a single connection is reused for before the
+    # engine opens a new one (servers usually cap tries per connection).
+    tries_per_connection = 1
+
+    def __init__(self, target, port=None, timeout=5.0):
+        self.target = target
+        self.port = port or self.default_port
+        self.timeout = timeout
+
+    def connect(self):
+        raise NotImplementedError
+
+    def try_credential(self, conn, username, password):
+        raise NotImplementedError
+
+    def close(self, conn):
+        pass
+
+    def __str__(self):
+        return f'{self.name}://{self.target}:{self.port}'
+
+
+class SSHProtocol(Protocol):
+    name = 'ssh'
+    default_port = 22
+    # OpenSSH's MaxAuthTries defaults to 6; stay under it.
+    tries_per_connection = 5
+
+    def connect(self):
+        sock = socket.create_connection((self.target, self.port), timeout=self.timeout)
+        transport = paramiko.Transport(sock)
+        transport.banner_timeout = self.timeout
+        transport.start_client(timeout=self.timeout)
+        return transport
+
+    def try_credential(self, conn, username, password):
+        if not conn.is_active():
+            raise ConnectionError('ssh transport closed by server')
+        try:
+            conn.auth_password(username, password)
+        except paramiko.BadAuthenticationType as e:
+            raise FatalError(f'password authentication not allowed: {e.allowed_types}') from e
+        except paramiko.AuthenticationException:
+            return False
+        return conn.is_authenticated()
+
+    def close(self, conn):
+        conn.close()
+
+
+class FTPProtocol(Protocol):
+    name = 'ftp'
+    default_port = 21
+    tries_per_connection = 3
+
+    def connect(self):
+        ftp = ftplib.FTP()
+        ftp.connect(self.target, self.port, timeout=self.timeout)
+        return ftp
+
+    def try_credential(self, conn, username, password):
+        try:
+            conn.login(username, password)
+        except ftplib.error_perm as e:
+            # 530 = login incorrect; anything else is unexpected
+            if str(e).startswith('530'):
+                return False
+            raise
+        return True
+
+    def close(self, conn):
+        try:
+            conn.quit()
+        except (OSError, EOFError, ftplib.Error):
+            conn.close()
+
+
+class HTTPBasicProtocol(Protocol):
+    name = 'http-basic'
+    default_port = 80
+    # Keep-alive: one session carries as many attempts as the server allows.
+    tries_per_connection = 100
+
+    def __init__(self, target, port=None, timeout=5.0, path='/', https=False):
+        if https and port is None:
+            port = 443
+        super().__init__(target, port, timeout)
+        scheme = 'https' if https else 'http'
+        self.url = f'{scheme}://{target}:{self.port}{path}'
+
+    def connect(self):
+        return requests.Session()
+
+    def check_status(self, r):
+        # Statuses that say nothing about the credentials.
+        if r.status_code == 429:
+            raise RetryLater('rate limited (429)', retry_after(r))
+        if r.status_code == 404:
+            raise FatalError(f'{self.url} not found (404)')
+        if r.status_code >= 500:
+            raise ConnectionError(f'server error {r.status_code}')
+
+    def try_credential(self, conn, username, password):
+        r = conn.get(self.url, auth=(username, password), timeout=self.timeout,
+                     allow_redirects=False)
+        self.check_status(r)
+        if r.status_code in (401, 403):
+            return False
+        if 300 <= r.status_code < 400:
+            # A redirect, to a login page or elsewhere, is not the resource
+            # accepting the credentials: the URL is probably wrong.
+            raise FatalError(f'{self.url} redirects to {r.headers.get("Location")!r} '
+                             f'({r.status_code}): wrong URL?')
+        if 200 <= r.status_code < 300:
+            return True
+        raise FatalError(f'unexpected status {r.status_code} from {self.url}')
+
+    def close(self, conn):
+        conn.close()
+
+
+class HTTPFormProtocol(HTTPBasicProtocol):
+    name = 'http-form'
+
+    def __init__(self, target, port=None, timeout=5.0, path='/login', https=False,
+                 user_field='username', pass_field='password', fail_text=None):
+        super().__init__(target, port, timeout, path, https)
+        self.user_field = user_field
+        self.pass_field = pass_field
+        self.fail_text = fail_text
+
+    def try_credential(self, conn, username, password):
+        data = {self.user_field: username, self.pass_field: password}
+        r = conn.post(self.url, data=data, timeout=self.timeout, allow_redirects=False)
+        self.check_status(r)
+        if r.status_code in (401, 403):
+            return False
+        if self.fail_text is not None:
+            return self.fail_text not in r.text
+        # Without a failure marker, a redirect after POST is the usual success signal.
+        return 300 <= r.status_code < 400
+
+
+PROTOCOLS = {
+    cls.name: cls
+    for cls in (SSHProtocol, FTPProtocol, HTTPBasicProtocol, HTTPFormProtocol)
+}
@@ -0,0 +1,349 @@
+import argparse
+import base64
+import socket
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import paramiko
+
+import dnsresolver
+
+# Local stand-in servers for trying the tools in this directory offline.
+# The login servers accept exactly one username/password pair, the web target
+# serves a fixed set of paths and virtual hosts. All run on 127.0.0.1, e.g.:
+#
+#   python standin_servers.py ftp --port 2121 --user admin --password letmein
+#   python bruteforcing.py -P ftp -t 127.0.0.1 -p 2121 -u admin -w passwords.txt
+#
+#   python standin_servers.py web --port 8080 --paths /admin.html,/login.php --soft404 200
+#   python DirectoryEnum.py 127.0.0.1:8080
+#
+#   python standin_servers.py dns --port 5353 --records www.example.test=127.0.0.1
+#   python subdomainEnum.py example.test --resolvers 127.0.0.1:5353
+
+
+class FTPHandler(socketserver.StreamRequestHandler):
+    # Just enough of RFC 959 for USER/PASS/QUIT.
+    max_tries = 3
+
+    def send(self, line):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        self.send('220 stand-in FTP ready')
+        user = None
+        tries = 0
+        for raw in self.rfile:
+            cmd, _, arg = raw.decode(errors='replace').strip().partition(' ')
+            cmd = cmd.upper()
+            if cmd == 'USER':
+                user = arg
+                self.send('331 password required')
+            elif cmd == 'PASS':
+                if (user, arg) == (self.server.username, self.server.password):
+                    self.send('230 login successful')
+                else:
+                    tries += 1
+                    self.send('530 login incorrect')
+                    if tries >= self.max_tries:
+                        return
+            elif cmd == 'QUIT':
+                self.send('221 bye')
+                return
+            else:
+                self.send('502 command not implemented')
+
+
+class FTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, username, password):
+        super().__init__(address, FTPHandler)
+        self.username = username
+        self.password = password
+
+
+class HTTPAuthHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive
+    wbufsize = -1                   # headers and body in one segment (no Nagle stalls)
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, code, body=b'', headers=()):
+        self.send_response(code)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        expected = f'{self.server.username}:{self.server.password}'.encode()
+        header = self.headers.get('Authorization', '')
+        if header == 'Basic ' + base64.b64encode(expected).decode():
+            self.reply(200, b'welcome')
+        else:
+            self.reply(401, b'unauthorized', [('WWW-Authenticate', 'Basic realm="stand-in"')])
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        creds = (form.get('username', [''])[0], form.get('password', [''])[0])
+        if creds == (self.server.username, self.server.password):
+            self.reply(302, headers=[('Location', '/home')])
+        else:
+            self.reply(200, b'Invalid username or password')
+
+
+class HTTPAuthServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, username, password):
+        super().__init__(address, HTTPAuthHandler)
+        self.username = username
+        self.password = password
+
+
+class WebTargetHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, code, body=b'', headers=(), head=False):
+        self.send_response(code)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        host = self.headers.get('Host', '').rsplit(':', 1)[0].lower()
+        if server.vhosts and host not in server.vhosts and host not in ('127.0.0.1', 'localhost'):
+            # Unknown virtual host: hang up without answering, which clients
+            # see the same way as a name that does not resolve.
+            self.close_connection = True
+            return
+
+        path = urlsplit(self.path).path
+        if path in server.paths:
+            body = f'<html><body>{host}{path}</body></html>'.encode() + b' ' * 512
+            self.reply(200, body, head=head)
+        elif server.soft404 == '200':
+            body = f'<html><body>Sorry, {path} was not found</body></html>'.encode()
+            self.reply(200, body + b' ' * 256, head=head)
+        elif server.soft404 == '302' and path == '/login':
+            self.reply(200, b'<html><body>login form</body></html>', head=head)
+        elif server.soft404 == '302':
+            self.reply(302, headers=[('Location', '/login?next=' + path)], head=head)
+        else:
+            self.reply(404, b'not found', head=head)
+
+
+class WebTargetServer(ThreadingHTTPServer):
+    """Web server for the enumerators.
+
+    paths    set of URL paths that exist ("/admin.html", "/admin/", ...)
+    soft404  what missing paths get: "none" (a real 404), "200" or "302"
+    latency  seconds slept before every response
+    vhosts   Host names that exist; other names get the connection dropped
+    """
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, paths=(), soft404='none', latency=0.0, vhosts=()):
+        super().__init__(address, WebTargetHandler)
+        self.paths = set(paths)
+        self.soft404 = soft404
+        self.latency = latency
+        self.vhosts = {v.lower() for v in vhosts}
+        self.hits = 0
+        self.lock = threading.Lock()
+
+
+class DNSHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        server = self.server
+        try:
+            query = dnsresolver.parse_message(data)
+        except (ValueError, IndexError, struct.error):
+            return
+        if query['question'] is None:
+            return
+        with server.lock:
+            server.hits += 1
+        name, qtype = query['question']
+
+        addresses = server.records.get(name)
+        if addresses is None and server.wildcard:
+            zone, address = server.wildcard
+            if name.endswith('.' + zone):
+                addresses = [address]
+        if addresses is None:
+            reply = dnsresolver.build_response(query, [], dnsresolver.RCODE_NXDOMAIN)
+        else:
+            answers = [(dnsresolver.TYPE_A, server.ttl, a) for a in addresses]
+            reply = dnsresolver.build_response(query, answers if qtype == dnsresolver.TYPE_A else [])
+        sock.sendto(reply, self.client_address)
+
+
+class DNSServer(socketserver.UDPServer):
+    """Authoritative-looking DNS server answering A queries.
+
+    records   {name: [ipv4, ...]}; anything else is NXDOMAIN
+    wildcard  optional (zone, ipv4): every name under zone resolves to ipv4
+    """
+    allow_reuse_address = True
+
+    def __init__(self, address, records=None, wildcard=None, ttl=60):
+        super().__init__(address, DNSHandler)
+        # Room for a burst of queries so the stand-in does not drop packets
+        # while it works through them one at a time.
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.records = {name.lower(): list(ips) for name, ips in (records or {}).items()}
+        self.wildcard = wildcard
+        self.ttl = ttl
+        self.hits = 0
+        self.lock = threading.Lock()
+
+
+class SSHServerInterface(paramiko.ServerInterface):
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (self.username, self.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+
+class SSHServer:
+    def __init__(self, address, username, password):
+        self.username = username
+        self.password = password
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(address)
+        self.sock.listen(100)
+        self.server_address = self.sock.getsockname()
+
+    def handle(self, client):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        try:
+            transport.start_server(server=SSHServerInterface(self.username, self.password))
+            transport.accept(timeout=30)
+        except (paramiko.SSHException, EOFError, OSError):
+            pass
+        finally:
+            transport.close()
+
+    def serve_forever(self):
+        while True:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.handle, args=(client,), daemon=True).start()
+
+    def shutdown(self):
+        self.sock.close()
+
+
+SERVERS = {'ftp': FTPServer, 'http': HTTPAuthServer, 'ssh': SSHServer}
+
+
+def start(kind, username, password, port=0):
+    """Starts a stand-in server in a background thread and returns it.
+
+    server.server_address holds the (host, port) actually bound, which is
+    handy with port=0.
+    """
+    server = SERVERS[kind](('127.0.0.1', port), username, password)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_web(paths=(), soft404='none', latency=0.0, vhosts=(), port=0):
+    """Like start(), for the web target."""
+    server = WebTargetServer(('127.0.0.1', port), paths, soft404, latency, vhosts)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_dns(records=None, wildcard=None, ttl=60, port=0):
+    """Like start(), for the DNS server."""
+    server = DNSServer(('127.0.0.1', port), records, wildcard, ttl)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_records(text):
+    # "a.example.test=10.0.0.1,b.example.test=10.0.0.2"
+    records = {}
+    for item in split_list(text):
+        name, _, address = item.partition('=')
+        records.setdefault(name.lower(), []).append(address)
+    return records
+
+
+def split_list(text):
+    return [item.strip() for item in text.split(',') if item.strip()] if text else []
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in login servers')
+    parser.add_argument('kind', choices=sorted(SERVERS) + ['dns', 'web'])
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--user', default='admin')
+    parser.add_argument('--password', default='letmein')
+    parser.add_argument('--paths', help='web: comma-separated existing paths')
+    parser.add_argument('--soft404', choices=['none', '200', '302'], default='none')
+    parser.add_argument('--latency', type=float, default=0.0, help='web: seconds per response')
+    parser.add_argument('--vhosts', help='web: comma-separated existing Host names')
+    parser.add_argument('--records', help='dns: comma-separated name=ipv4 records')
+    parser.add_argument('--wildcard', help='dns: zone=ipv4 to answer for every name in zone')
+    args = parser.parse_args()
+
+    if args.kind == 'dns':
+        wildcard = tuple(args.wildcard.split('=', 1)) if args.wildcard else None
+        server = DNSServer(('127.0.0.1', args.port), parse_records(args.records), wildcard)
+        host, port = server.server_address[:2]
+        print(f'dns stand-in listening on {host}:{port}/udp')
+    elif args.kind == 'web':
+        server = WebTargetServer(('127.0.0.1', args.port), split_list(args.paths), args.soft404,
+                                 args.latency, split_list(args.vhosts))
+        host, port = server.server_address[:2]
+        print(f'web target listening on {host}:{port}')
+    else:
+        server = SERVERS[args.kind](('127.0.0.1', args.port), args.user, args.password)
+        host, port = server.server_address[:2]
+        print(f'{args.kind} stand-in listening on {host}:{port} ({args.user}:{args.password})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
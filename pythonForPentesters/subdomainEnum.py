@@ -1,20 +1,329 @@
-import requests
+import argparse
+import asyncio
+import hashlib
+import math
+import re
+import secrets
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-if len(sys.argv) < 2:
-    print("Usage: python subdomainEnum.py <domain>")
-    sys.exit(1)
+import requests
 
-sub_list = open('subdomains.txt').read()
-subdoms = sub_list.splitlines()
+import probelog
+from dnsresolver import AsyncResolver, DNSCache, system_resolvers
+from httpclient import Client
 
-for sub in subdoms:
-    sub_domain = f"http://{sub}.{sys.argv[1]}"
-    try:
-        requests.get(sub_domain)
-    except requests.ConnectionError:
-        pass
+WORDLIST = 'subdomains.txt'
+CACHE_FILE = 'dns_cache.json'
+WILDCARD_PROBES = 3
+
+# Words combined with discovered labels by the permutation stage.
+ENV_WORDS = ['dev', 'stg', 'staging', 'test', 'qa', 'uat', 'prod', 'api', 'admin',
+             'internal', 'beta', 'old', 'new', 'v1', 'v2']
+INCREMENTS = 3
+
+
+def probe(sub_domain, connect=None, timeout=5.0, client=requests):
+    # connect="ip[:port]" sends the request there with the subdomain in the
+    # Host header instead of resolving it (e.g. a local stand-in server).
+    if connect:
+        client.get(f"http://{connect}/", headers={"Host": sub_domain}, timeout=timeout)
     else:
-        print("Valid domain:", sub_domain)
+        client.get(f"http://{sub_domain}", timeout=timeout)
+
+
+def enumerate_subdomains(domain, subdoms, connect=None, timeout=5.0, client=None, rate=0):
+    # Probing is sequential; a one-connection client is enough to reuse it.
+    # No retries: a refused connection is the usual answer for a missing name.
+    client = client or Client(1, retries=0, timeout=timeout, rate=rate)
+    found = []
+    for sub in subdoms:
+        sub_domain = f"{sub}.{domain}"
+        try:
+            probe(sub_domain, connect, timeout, client)
+        except requests.RequestException:
+            pass
+        else:
+            found.append(sub_domain)
+            print("Valid domain:", f"http://{sub_domain}")
+    return found
+
+
+def http_check(sub_domain, address, port=80, timeout=5.0, client=requests):
+    # The name is already resolved: connect to the address we got and send
+    # the name as Host, so the OS resolver is not asked a second time.
+    try:
+        probe(sub_domain, f"{address}:{port}", timeout, client)
+    except requests.RequestException:
+        return False
+    print("Valid domain:", f"http://{sub_domain}")
+    return True
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set of strings.
+
+    Uses about 1.8 bytes per name at the default 0.1% false-positive rate,
+    so millions of generated candidates can be deduplicated in a few MB. A
+    false positive only means a candidate is skipped, never a wrong result.
+    """
+
+    def __init__(self, capacity=2_000_000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        """Adds item; returns False if it was (probably) already present."""
+        new = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                new = True
+        return new
+
+
+def permutations(name, domain, words=ENV_WORDS, increments=INCREMENTS):
+    """Lazily yields mutations of a discovered name's leftmost label.
+
+    api2.example.com -> api1/api3/..., api2-dev, dev-api2, api2dev,
+    dev.api2, ... all under the same domain.
+    """
+    label = name[:-len(domain) - 1]
+    first, dot, rest = label.partition('.')
+    suffix = f"{dot}{rest}.{domain}"
+
+    numbers = list(re.finditer(r'\d+', first))
+    for m in numbers:
+        n, width = int(m.group()), len(m.group())
+        for delta in range(-increments, increments + 1):
+            if delta and n + delta >= 0:
+                yield f"{first[:m.start()]}{n + delta:0{width}d}{first[m.end():]}{suffix}"
+    if not numbers:
+        for i in range(1, increments + 1):
+            yield f"{first}{i}{suffix}"
+
+    for word in words:
+        if word == first:
+            continue
+        yield f"{first}-{word}{suffix}"
+        yield f"{word}-{first}{suffix}"
+        yield f"{first}{word}{suffix}"
+        yield f"{word}.{label}.{domain}"
+
 
+class CandidateQueue:
+    """Iterator of names to resolve: the wordlist, plus permutations of hits.
 
+    Every result is reported back through completed(); names that resolved
+    get their permutations interleaved with the rest of the wordlist, so
+    they are tried straight away. All names pass through one BloomFilter,
+    so nothing is resolved twice. Unlike a generator this iterator can run
+    dry and later produce more, which resolve_many() relies on.
+    """
+
+    def __init__(self, domain, subdoms, permute=True, max_generation=1, words=ENV_WORDS,
+                 seen=None):
+        self.domain = domain
+        self.base = iter(subdoms)
+        self.permute = permute
+        self.max_generation = max_generation
+        self.words = words
+        self.seen = seen if seen is not None else BloomFilter()
+        self.pending = deque()      # (generation, permutation generator)
+        self.in_flight = {}         # generated candidate -> its generation
+        self.base_turn = False
+        self.generated = 0
+
+    def completed(self, name, found):
+        generation = self.in_flight.pop(name, 0)
+        if found and self.permute and generation < self.max_generation:
+            self.pending.append((generation + 1, permutations(name, self.domain, self.words)))
+
+    def __iter__(self):
+        return self
+
+    def _from_base(self):
+        if self.base is not None:
+            sub = next(self.base, None)
+            if sub is not None:
+                return 0, f"{sub}.{self.domain}"
+            self.base = None
+        return None
+
+    def _from_pending(self):
+        while self.pending:
+            generation, gen = self.pending[0]
+            name = next(gen, None)
+            if name is not None:
+                self.generated += 1
+                return generation, name
+            self.pending.popleft()
+        return None
+
+    def __next__(self):
+        while True:
+            # Alternate between the wordlist and the permutation backlog.
+            self.base_turn = not self.base_turn
+            sources = ((self._from_base, self._from_pending) if self.base_turn
+                       else (self._from_pending, self._from_base))
+            for source in sources:
+                item = source()
+                if item is not None:
+                    break
+            else:
+                raise StopIteration
+            generation, name = item
+            if self.seen.add(name.lower()):
+                if generation:
+                    self.in_flight[name] = generation
+                return name
+
+
+class WildcardFilter:
+    """Detects wildcard DNS zones and drops answers that only match the wildcard.
+
+    For each parent zone a few random labels are resolved; if they resolve,
+    the zone is a wildcard and the addresses they return are its
+    fingerprint. A candidate whose addresses all fall inside that
+    fingerprint is indistinguishable from a name that does not exist.
+    """
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self.zones = {}     # zone -> future of frozenset of wildcard addresses
+        self.filtered = 0
+
+    async def _probe(self, zone):
+        addresses = set()
+        for _ in range(WILDCARD_PROBES):
+            answer = await self.resolver.resolve(f"{secrets.token_hex(6)}.{zone}", use_cache=False)
+            if answer:
+                addresses.update(answer)
+        if addresses:
+            print(f"wildcard DNS on *.{zone} -> {', '.join(sorted(addresses))}")
+        return frozenset(addresses)
+
+    async def fingerprint(self, zone):
+        # Shared future, so concurrent callers probe each zone only once.
+        if zone not in self.zones:
+            self.zones[zone] = asyncio.ensure_future(self._probe(zone))
+        return await self.zones[zone]
+
+    async def is_wildcard(self, name, addresses):
+        wildcard = await self.fingerprint(name.split('.', 1)[1])
+        if wildcard and set(addresses) <= wildcard:
+            self.filtered += 1
+            return True
+        return False
+
+
+async def enumerate_resolved(domain, subdoms, resolver, concurrency=200, http_workers=20,
+                             http_port=80, timeout=5.0, wildcard=True, permute=True,
+                             max_generation=1, client=None, rate=0):
+    """Two-stage enumeration: DNS first, HTTP only for names that resolve.
+
+    Lookups run concurrently over UDP; every name that resolves (and is not
+    just a wildcard answer) is handed to a thread pool for the HTTP check
+    while resolution carries on, and its permutations are queued for
+    resolution. Returns the names that answered over HTTP. rate caps the
+    HTTP checks per second (0: no limit).
+    """
+    loop = asyncio.get_running_loop()
+    # Names sharing an address share its pooled keep-alive connections.
+    client = client or Client(http_workers, retries=0, timeout=timeout, rate=rate)
+    candidates = CandidateQueue(domain, subdoms, permute, max_generation)
+    checks = {}
+    resolved = 0
+    with ThreadPoolExecutor(http_workers) as pool:
+        async with resolver:
+            wildcards = WildcardFilter(resolver) if wildcard else None
+            if wildcards:
+                await wildcards.fingerprint(domain)
+            async for name, addresses in resolver.resolve_many(candidates, concurrency):
+                if not addresses or (wildcards and await wildcards.is_wildcard(name, addresses)):
+                    candidates.completed(name, False)
+                    continue
+                resolved += 1
+                candidates.completed(name, True)
+                checks[name] = loop.run_in_executor(pool, http_check, name, addresses[0],
+                                                    http_port, timeout, client)
+        results = await asyncio.gather(*checks.values())
+    summary = f"{resolved} names resolved, {sum(results)} answered over HTTP"
+    if wildcards and wildcards.filtered:
+        summary += f", {wildcards.filtered} wildcard answers dropped"
+    if candidates.generated:
+        summary += f", {candidates.generated} permutations generated"
+    if resolver.cache is not None:
+        summary += f", {resolver.cache.hits} lookups served from cache"
+    print(summary)
+    print("HTTP:", client.metrics.summary())
+    return [name for name, ok in zip(checks, results) if ok]
+
+
+def read_words(path):
+    with open(path) as file:
+        for line in file:
+            word = line.strip()
+            if word:
+                yield word
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Subdomain enumerator")
+    parser.add_argument("domain")
+    parser.add_argument("-w", "--wordlist", default=WORDLIST)
+    parser.add_argument("--connect", metavar="IP[:PORT]",
+                        help="skip DNS and send every request to this address with the "
+                             "subdomain as Host header")
+    parser.add_argument("--resolvers", default=",".join(system_resolvers()),
+                        help="comma-separated DNS servers (ip[:port])")
+    parser.add_argument("-c", "--concurrency", type=int, default=200,
+                        help="DNS lookups in flight")
+    parser.add_argument("--http-workers", type=int, default=20)
+    parser.add_argument("--http-port", type=int, default=80)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--cache", default=CACHE_FILE,
+                        help="file the DNS answers are cached in between runs")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-wildcard", action="store_true",
+                        help="do not detect and filter wildcard DNS answers")
+    parser.add_argument("--no-permute", action="store_true",
+                        help="only try the wordlist, not mutations of discovered names")
+    parser.add_argument("--permute-depth", type=int, default=1,
+                        help="also permute names found by permutation, this many rounds")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="max HTTP requests per second (0 = unlimited)")
+    probelog.add_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python subdomainEnum.py <domain>")
+        sys.exit(1)
+    args = parse_args()
+    probelog.configure_from_args(args)
+
+    if args.connect:
+        enumerate_subdomains(args.domain, read_words(args.wordlist), args.connect, args.timeout,
+                             rate=args.rate)
+    else:
+        cache = None if args.no_cache else DNSCache(args.cache)
+        resolver = AsyncResolver(args.resolvers.split(","), cache=cache)
+        asyncio.run(enumerate_resolved(args.domain, read_words(args.wordlist), resolver,
+                                       args.concurrency, args.http_workers, args.http_port,
+                                       args.timeout, wildcard=not args.no_wildcard,
+                                       permute=not args.no_permute,
+                                       max_generation=args.permute_depth, rate=args.rate))
@@ -21,96 +21,112 @@
 import re
 
 # Collection of regex patterns with examples
+# "literals": strings a match always contains at least one of (None: no
+# such string). A line holding none of them cannot match, so scanners can
+# skip the pattern there without running it (see ioc_scanner.py).
 regex_examples = {
     # IP address matching (IPv4)
     "ipv4": {
         "pattern": r"\b(?:\d{1,3}\.){3}\d{1,3}\b",
         "examples": ["192.168.1.1", "10.0.0.1", "172.16.254.1"],
-        "description": "Matches IPv4 addresses (simple pattern, doesn't validate ranges)"
+        "description": "Matches IPv4 addresses (simple pattern, doesn't validate ranges)",
+        "literals": ["."]
     },
     
     # More accurate IPv4 validation
     "ipv4_strict": {
         "pattern": r"\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\b",
         "examples": ["192.168.1.1", "255.255.255.255", "0.0.0.0"],
-        "description": "Validates IPv4 addresses with proper range checking"
+        "description": "Validates IPv4 addresses with proper range checking",
+        "literals": ["."]
     },
     
     # MAC address matching
     "mac_address": {
         "pattern": r"(?:[0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}",
         "examples": ["00:1A:2B:3C:4D:5E", "00-1A-2B-3C-4D-5E"],
-        "description": "Matches MAC addresses with : or - separators"
+        "description": "Matches MAC addresses with : or - separators",
+        "literals": [":", "-"]
     },
     
     # Email address matching
     "email": {
         "pattern": r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}",
         "examples": ["user@example.com", "john.doe123@company-name.co.uk"],
-        "description": "Matches email addresses"
+        "description": "Matches email addresses",
+        "literals": ["@"]
     },
     
     # URL matching
     "url": {
         "pattern": r"https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&//=]*)",
         "examples": ["https://www.example.com", "http://subdomain.example.co.uk/path?query=value"],
-        "description": "Matches HTTP and HTTPS URLs"
+        "description": "Matches HTTP and HTTPS URLs",
+        "literals": ["://"]
     },
     
     # Credit card number (simplified)
     "credit_card": {
         "pattern": r"\b(?:\d{4}[- ]?){3}\d{4}\b",
         "examples": ["1234-5678-9012-3456", "1234 5678 9012 3456", "1234567890123456"],
-        "description": "Matches credit card numbers with or without separators"
+        "description": "Matches credit card numbers with or without separators",
+        "literals": None
     },
     
     # Password strength check (minimum 8 chars, at least one uppercase, lowercase, number, and special char)
     "strong_password": {
         "pattern": r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{8,}$",
         "examples": ["Passw0rd!", "Str0ng@Pass"],
-        "description": "Validates strong passwords with specific requirements"
+        "description": "Validates strong passwords with specific requirements",
+        "literals": None
     },
     
     # Date formats (MM/DD/YYYY or DD/MM/YYYY)
     "date": {
         "pattern": r"\b(?:0[1-9]|[12][0-9]|3[01])[/.-](?:0[1-9]|1[0-2])[/.-](?:19|20)\d\d\b",
         "examples": ["25/12/2023", "01-31-2022", "12.25.2021"],
-        "description": "Matches dates in various formats"
+        "description": "Matches dates in various formats",
+        "literals": ["/", ".", "-"]
     },
     
     # Log file timestamp
     "log_timestamp": {
         "pattern": r"\b\d{4}[-/]\d{2}[-/]\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b",
         "examples": ["2023-09-15T13:45:30Z", "2023/09/15 13:45:30.123+01:00"],
-        "description": "Matches ISO 8601 and common log timestamps"
+        "description": "Matches ISO 8601 and common log timestamps",
+        "literals": [":"]
     },
     
     # Windows file path
     "windows_path": {
-        "pattern": r"[A-Za-z]:\\(?:[^\\/:*?\"<>|\r\n]+\\)*[^\\/:*?\"<>|\r\n]*",
-        "examples": ["C:\\Users\\Username\\Documents\\file.txt", "D:\\Program Files\\App\\"],
-        "description": "Matches Windows file paths"
+        "pattern": r"[A-Za-z]:\\(?:[^\\/:*?\"<>|\s]+\\)*[^\\/:*?\"<>|\s]*",
+        "examples": ["C:\\Users\\Username\\Documents\\file.txt", "D:\\ProgramData\\App\\"],
+        "description": "Matches Windows file paths",
+        "literals": [":\\"]
     },
     
     # Linux/Unix file path
     "unix_path": {
-        "pattern": r"/(?:[^/\0]+/)*[^/\0]*",
+        "pattern": r"/(?:[^/\0\s]+/)*[^/\0\s]*",
         "examples": ["/etc/passwd", "/var/log/syslog", "/home/user/documents/file.txt"],
-        "description": "Matches Unix/Linux file paths"
+        "description": "Matches Unix/Linux file paths",
+        "literals": ["/"]
     },
     
     # Domain name
     "domain": {
         "pattern": r"(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}",
         "examples": ["example.com", "sub.domain.co.uk"],
-        "description": "Matches domain names"
+        "description": "Matches domain names",
+        "literals": ["."]
     },
     
     # UUID/GUID
     "uuid": {
         "pattern": r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
         "examples": ["550e8400-e29b-41d4-a716-446655440000", "123e4567-e89b-12d3-a456-426614174000"],
-        "description": "Matches UUIDs/GUIDs"
+        "description": "Matches UUIDs/GUIDs",
+        "literals": ["-"]
     }
 }
 
@@ -135,9 +151,10 @@ def test_regex_pattern(pattern_name):
     print("\n")
 
 # Test a few patterns
-test_regex_pattern("ipv4")
-test_regex_pattern("email")
-test_regex_pattern("mac_address")
+if __name__ == "__main__":
+    test_regex_pattern("ipv4")
+    test_regex_pattern("email")
+    test_regex_pattern("mac_address")
 
 # Device IDs for practice
 device_Ids = [
@@ -168,15 +185,22 @@ sample_log = """
 2023-09-15T13:47:05Z Device 00:1A:2B:3C:4D:5E connected to network
 """
 
-def extract_ips_from_log():
-    ip_pattern = re.compile(regex_examples["ipv4"]["pattern"])
-    matches = ip_pattern.findall(sample_log)
+def extract_ips_from_log(path=None):
+    # With a path, the (possibly multi-GB) file is scanned in parallel by
+    # ioc_scanner.extract_file, which lists each address once.
+    if path:
+        from ioc_scanner import extract_file
+        matches = [m.value.decode() for m in extract_file(path, ["ipv4"])]
+    else:
+        ip_pattern = re.compile(regex_examples["ipv4"]["pattern"])
+        matches = ip_pattern.findall(sample_log)
     print(f"Found {len(matches)} IP addresses in log:")
     for match in matches:
         print(f"  - {match}")
 
 # Run the examples
-print("===== REGEX EXAMPLES FOR CYBERSECURITY =====\n")
-find_mac_addresses()
-print()
-extract_ips_from_log()
\ No newline at end of file
+if __name__ == "__main__":
+    print("===== REGEX EXAMPLES FOR CYBERSECURITY =====\n")
+    find_mac_addresses()
+    print()
+    extract_ips_from_log()
\ No newline at end of file
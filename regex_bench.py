@@ -0,0 +1,189 @@
+import argparse
+import math
+import random
+import re
+import time
+
+from ioc_scanner import IOCScanner, PRIORITY
+from regex import regex_examples
+
+# Performance suite for the patterns in regex.py:
+#
+#   python regex_bench.py                 throughput of every pattern (MB/s)
+#   python regex_bench.py --fuzz          look for super-linear inputs
+#   python regex_bench.py --guard         one hostile line, with and without
+#                                         the scanner's guards
+#
+# Throughput is measured on a synthetic but realistic log corpus (sshd,
+# web access and application lines) and on an adversarial one made of the
+# worst inputs the fuzzer knows for each pattern.
+#
+# The fuzzer builds inputs by repeating fragments of a pattern's examples n
+# times and appending a character that breaks the match, then times the
+# search at growing n. A backtracking engine is linear when the time grows
+# like n; the growth exponent log(t(4n) / t(n)) / log(4) is reported, and
+# anything around 2 or more means one long line can stall a scan.
+
+SEED = 1
+BREAKERS = ["", "!", " ", "\n", "@", "\\", "/", "-", ".", ":"]
+
+
+def realistic_corpus(lines=50000, seed=SEED):
+    rng = random.Random(seed)
+    words = ("request completed worker queue started cache miss retry ok user session "
+             "flush batch connection reset timeout").split()
+    out = []
+    for i in range(lines):
+        ip = ".".join(str(rng.randrange(256)) for _ in range(4))
+        kind = rng.random()
+        if kind < 0.3:
+            out.append(f"2023-09-15T13:45:{i % 60:02d}Z sshd[{rng.randrange(9999)}]: Failed "
+                       f"password for user{i % 97} from {ip} port 22 ssh2")
+        elif kind < 0.5:
+            out.append(f'{ip} - - [15/Sep/2023:13:45:30 +0000] "GET /static/app.js?v={i} '
+                       f'HTTP/1.1" 200 512 "https://example.com/" "Mozilla/5.0"')
+        elif kind < 0.55:
+            out.append(f"dhcp: lease 00:1a:2b:{i % 256:02x}:4d:5e to {ip} for ops{i}@corp.example")
+        else:
+            out.append(f"INFO [worker-{i % 8}] " + " ".join(rng.choice(words) for _ in range(10)))
+    return "\n".join(out) + "\n"
+
+
+def fragments(name):
+    # Pieces of the examples: every prefix and a few inner slices.
+    pieces = set()
+    for example in regex_examples[name]["examples"]:
+        for i in range(1, len(example) + 1):
+            pieces.add(example[:i])
+        for i in range(len(example)):
+            pieces.add(example[i:i + 2])
+            pieces.add(example[i])
+    return sorted(pieces)
+
+
+def candidates(name, rng, count=60):
+    pieces = fragments(name)
+    for _ in range(count):
+        head = rng.choice(pieces) if rng.random() < 0.5 else ""
+        body = rng.choice(pieces)
+        yield head, body, rng.choice(BREAKERS)
+
+
+def time_search(regex, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        regex.findall(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth(regex, head, body, tail, n=250, min_time=0.002, max_n=64000):
+    """Growth exponent of the search time when the input grows 4x, and the
+    time at the larger size."""
+    # Grow n until the timing is well above clock noise.
+    while True:
+        t1 = time_search(regex, head + body * n + tail)
+        if t1 >= min_time or n * 4 > max_n:
+            break
+        n *= 2
+    t2 = time_search(regex, head + body * (4 * n) + tail)
+    return math.log(max(t2, 1e-9) / max(t1, 1e-9)) / math.log(4), t2, len(head + body * 4 * n)
+
+
+def fuzz(names, rounds=60, seed=SEED):
+    """Returns {name: (exponent, seconds, length, input)} for the worst input found."""
+    rng = random.Random(seed)
+    worst = {}
+    for name in names:
+        regex = re.compile(regex_examples[name]["pattern"])
+        for head, body, tail in candidates(name, rng, rounds):
+            exponent, seconds, length = growth(regex, head, body, tail)
+            if name not in worst or exponent > worst[name][0]:
+                worst[name] = (exponent, seconds, length, (head, body, tail))
+    return worst
+
+
+def adversarial_corpus(worst, size=20000):
+    # One long line per pattern, built from its worst fuzz input.
+    lines = []
+    for name, (_, _, _, (head, body, tail)) in worst.items():
+        lines.append(head + body * max(1, (size - len(head)) // max(1, len(body))) + tail)
+    return "\n".join(lines) + "\n"
+
+
+def throughput(names, text, scanners=True):
+    size = len(text.encode()) / 1e6
+    results = {}
+    for name in names:
+        results[name] = size / time_search(re.compile(regex_examples[name]["pattern"]), text, 1)
+    if not scanners:
+        return results
+    for label, scanner in (("scanner (all)", IOCScanner(prefilter=False, max_line=0)),
+                           ("scanner + prefilter", IOCScanner(max_line=0))):
+        start = time.perf_counter()
+        for _ in scanner.scan(text):
+            pass
+        results[label] = size / (time.perf_counter() - start)
+    return results
+
+
+def guard_demo(worst, budget=0.1):
+    # A realistic log with one hostile line in the middle, scanned with no
+    # guards, with the line-length cap and with a per-line time budget.
+    name = max(worst, key=lambda n: worst[n][0])
+    head, body, tail = worst[name][3]
+    hostile = head + body * (20000 // max(1, len(body))) + tail
+    # Add the pattern's literal, or the prefilter would skip the line anyway.
+    literals = regex_examples[name].get("literals")
+    if literals and not any(lit in hostile for lit in literals):
+        hostile += " " + literals[0]
+    text = realistic_corpus(20000)
+    middle = text.index("\n", len(text) // 2) + 1
+    text = text[:middle] + hostile.replace("\n", " ") + "\n" + text[middle:]
+    print(f"hostile line: {len(hostile)} chars built from the worst {name!r} input")
+    for label, options in (("no guard", {"max_line": 0}),
+                           ("max_line 4096", {"max_line": 4096}),
+                           (f"time_budget {budget}s", {"max_line": 0, "time_budget": budget})):
+        scanner = IOCScanner(**options)
+        start = time.perf_counter()
+        found = sum(1 for _ in scanner.scan(text))
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<20}{elapsed:>8.2f}s  {found} matches, skipped {dict(scanner.skipped)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and fuzz the regex_examples patterns")
+    parser.add_argument("--patterns", default=",".join(PRIORITY),
+                        help="comma-separated subset of the patterns")
+    parser.add_argument("--lines", type=int, default=50000, help="lines of realistic corpus")
+    parser.add_argument("--fuzz", action="store_true", help="search for super-linear inputs")
+    parser.add_argument("--rounds", type=int, default=60, help="fuzz inputs per pattern")
+    parser.add_argument("--guard", action="store_true",
+                        help="show the scanner guards against the worst input found")
+    args = parser.parse_args()
+    names = args.patterns.split(",")
+
+    text = realistic_corpus(args.lines)
+    print(f"realistic corpus: {len(text) / 1e6:.1f} MB")
+    for name, rate in throughput(names, text).items():
+        print(f"  {name:<22}{rate:>8.1f} MB/s")
+
+    if args.fuzz or args.guard:
+        worst = fuzz(names, args.rounds)
+        print("worst inputs found (growth exponent: 1 linear, 2 quadratic):")
+        for name, (exponent, seconds, length, (head, body, tail)) in sorted(
+                worst.items(), key=lambda item: -item[1][0]):
+            flag = "  SUPER-LINEAR" if exponent > 1.5 else ""
+            print(f"  {name:<16}{exponent:>5.2f}  {seconds * 1000:>8.1f} ms on {length} chars"
+                  f"  {head!r} + {body!r} * n + {tail!r}{flag}")
+        hostile = adversarial_corpus(worst)
+        print(f"adversarial corpus: {len(hostile) / 1e6:.1f} MB")
+        for name, rate in throughput(list(worst), hostile, scanners=False).items():
+            print(f"  {name:<22}{rate:>8.2f} MB/s")
+        if args.guard:
+            guard_demo(worst)
+
+
+if __name__ == "__main__":
+    main()
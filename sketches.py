@@ -0,0 +1,167 @@
+import hashlib
+import heapq
+import math
+from array import array
+
+# Fixed-memory frequency estimates for streams too big to count exactly.
+#
+# CountMinSketch answers "how often was x seen?" for any x, overestimating
+# by at most epsilon * total with probability 1 - delta. SpaceSaving keeps
+# the k most frequent items seen so far. HeavyHitters runs both and reports
+# the top items with the tighter of the two estimates.
+#
+# All three can be merged: sketch each shard of the data (a file, a day of
+# logs) separately, in parallel, and merge the results. The hashes come from
+# blake2b rather than hash(), so sketches built in different processes agree.
+
+
+def _hashes(item):
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class CountMinSketch:
+    def __init__(self, epsilon=0.001, delta=0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.table = array('Q', bytes(8 * self.width * self.depth))
+        self.total = 0
+
+    def _cells(self, item):
+        h1, h2 = _hashes(item)
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, item, count=1):
+        # Returns the item's new estimate, saving a second lookup.
+        self.total += count
+        table = self.table
+        estimate = None
+        for cell in self._cells(item):
+            table[cell] += count
+            if estimate is None or table[cell] < estimate:
+                estimate = table[cell]
+        return estimate
+
+    def estimate(self, item):
+        return min(self.table[cell] for cell in self._cells(item))
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError('can only merge sketches with the same epsilon and delta')
+        for i, n in enumerate(other.table):
+            if n:
+                self.table[i] += n
+        self.total += other.total
+        return self
+
+
+class SpaceSaving:
+    """Top-k counter (Metwally et al.): k slots, the smallest one is recycled.
+
+    count is an overestimate of the true frequency by at most error, and
+    any item more frequent than total / k is guaranteed to be kept.
+    """
+
+    def __init__(self, k=100):
+        self.k = k
+        self.counts = {}        # item -> [count, error]
+        self.heap = []          # (count, item), may hold stale entries
+        self.total = 0
+
+    def _minimum(self):
+        # Drop heap entries whose count has since changed.
+        while True:
+            count, item = self.heap[0]
+            slot = self.counts.get(item)
+            if slot is not None and slot[0] == count:
+                return count, item
+            heapq.heappop(self.heap)
+
+    def add(self, item, count=1, estimate=None):
+        """Counts item; estimate is an upper bound on its total count so far
+        (e.g. from a CountMinSketch), if one is known.
+
+        Without an estimate an untracked item always takes over the smallest
+        slot, inheriting its count as error. With one it only does so if it
+        may really be more frequent, and starts from the estimate, which
+        stops a long tail of rare items from churning the slots. Only the
+        count added now is certain then, so the rest of the estimate is
+        error: count - error stays a lower bound either way.
+        """
+        self.total += count
+        slot = self.counts.get(item)
+        if slot is not None:
+            slot[0] += count
+        elif len(self.counts) < self.k:
+            slot = self.counts[item] = ([count, 0] if estimate is None
+                                        else [estimate, estimate - count])
+        else:
+            low, victim = self._minimum()
+            if estimate is not None and estimate <= low:
+                return
+            heapq.heappop(self.heap)
+            del self.counts[victim]
+            slot = self.counts[item] = ([low + count, low] if estimate is None
+                                        else [estimate, estimate - count])
+        heapq.heappush(self.heap, (slot[0], item))
+        if len(self.heap) > 4 * self.k:
+            self.heap = [(c, i) for i, (c, _) in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def floor(self):
+        # Upper bound on the count of any item that is not being tracked.
+        return min(c for c, _ in self.counts.values()) if len(self.counts) >= self.k else 0
+
+    def merge(self, other):
+        a, b = self.floor(), other.floor()
+        merged = {}
+        for item in self.counts.keys() | other.counts.keys():
+            ca, ea = self.counts.get(item, (a, a))
+            cb, eb = other.counts.get(item, (b, b))
+            merged[item] = [ca + cb, ea + eb]
+        top = heapq.nlargest(self.k, merged.items(), key=lambda kv: kv[1][0])
+        self.counts = dict(top)
+        self.heap = [(c, i) for i, (c, _) in self.counts.items()]
+        heapq.heapify(self.heap)
+        self.total += other.total
+        return self
+
+    def top(self, n=None):
+        ranked = sorted(self.counts.items(), key=lambda kv: -kv[1][0])
+        return [(item, count, error) for item, (count, error) in ranked[:n]]
+
+
+class HeavyHitters:
+    def __init__(self, k=100, epsilon=0.001, delta=0.01):
+        self.sketch = CountMinSketch(epsilon, delta)
+        self.top_k = SpaceSaving(k)
+
+    def add(self, item, count=1):
+        self.top_k.add(item, count, self.sketch.add(item, count))
+
+    def update(self, counts):
+        # counts: mapping of item -> count, e.g. a Counter of one batch.
+        for item, count in counts.items():
+            self.add(item, count)
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.top_k.merge(other.top_k)
+        return self
+
+    @property
+    def total(self):
+        return self.sketch.total
+
+    def top(self, n=10):
+        # Both are overestimates, so the smaller one is the better guess.
+        ranked = [(item, min(count, self.sketch.estimate(item)))
+                  for item, count, _ in self.top_k.top()]
+        ranked.sort(key=lambda pair: -pair[1])
+        return ranked[:n]
+
+    def error_bound(self):
+        # With probability 1 - delta no estimate is high by more than this.
+        return math.ceil(self.sketch.epsilon * self.sketch.total)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The scripts import their siblings by name, as when run from their own
+# directory; make both directories importable.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'pythonForPentesters')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from blocklist import WORD, KeywordMatcher
+
+
+def naive(keywords, text, ignore_case=False, whole_words=True):
+    # Every occurrence of every keyword, by str.find.
+    haystack = text.lower() if ignore_case else text
+    found = set()
+    for keyword in keywords:
+        needle = keyword.lower() if ignore_case else keyword
+        at = haystack.find(needle)
+        while at != -1:
+            end = at + len(needle)
+            if not whole_words or not (
+                    at and needle[0] in WORD and haystack[at - 1] in WORD
+                    or end < len(haystack) and needle[-1] in WORD and haystack[end] in WORD):
+                found.add((keyword, at, end))
+            at = haystack.find(needle, at + 1)
+    return found
+
+
+def random_case(rng, data):
+    return bytes(b ^ 0x20 if chr(b).isalpha() and rng.random() < 0.5 else b for b in data)
+
+
+@pytest.mark.parametrize('ignore_case', [False, True])
+@pytest.mark.parametrize('whole_words', [False, True])
+def test_matches_naive_search(tmp_path, ignore_case, whole_words):
+    rng = random.Random(49)
+    # A small alphabet, so that keywords overlap, nest and share prefixes
+    # and suffixes, which is where the fail links matter.
+    alphabet = b'ab.-'
+    keywords = {bytes(rng.choice(alphabet) for _ in range(rng.randint(1, 6)))
+                for _ in range(60)}
+    keywords = sorted(random_case(rng, k) if ignore_case else k for k in keywords)
+    if ignore_case:
+        # Keywords differing in case only are one keyword; the first stays.
+        keywords = list({k.lower(): k for k in reversed(keywords)}.values())
+    matcher = KeywordMatcher(ignore_case, whole_words)
+    for keyword in keywords:
+        matcher.add(keyword, 'odd' if len(keyword) % 2 else 'even')
+    matcher.finish()
+    path = tmp_path / 'keywords.acbl'
+    matcher.save(str(path))
+    loaded = KeywordMatcher.load(str(path))
+
+    for _ in range(50):
+        text = bytes(rng.choice(alphabet + b'AB ') for _ in range(rng.randint(0, 200)))
+        expected = naive(keywords, text, ignore_case, whole_words)
+        for m in (matcher, loaded):
+            found = list(m.scan(text))
+            assert {(f.value, f.start, f.end) for f in found} == expected
+            assert len(found) == len(expected)
+            assert [f.end for f in found] == sorted(f.end for f in found)
+            assert all(f.type == ('odd' if len(f.value) % 2 else 'even') for f in found)
+
+
+def test_whole_words_and_case():
+    matcher = KeywordMatcher(ignore_case=True)
+    matcher.add('evil.com', 'bad_domain')
+    matcher.add('-x-', 'marker')
+    text = 'notevil.com cdn.EVIL.com evil.comx a-x-b'
+    assert [(m.value, m.start) for m in matcher.scan(text)] == [
+        ('evil.com', 16), ('-x-', 36)]
+
+
+def test_str_positions_are_characters(tmp_path):
+    matcher = KeywordMatcher()
+    matcher.add('evil.com', 'bad_domain')
+    path = tmp_path / 'domains.acbl'
+    matcher.save(str(path))
+    text = 'héllo → evil.com'
+    for m in (matcher, KeywordMatcher.load(str(path))):
+        (match,) = m.scan(text, offset=100)
+        assert match.value == 'evil.com'
+        assert text[match.start - 100:match.end - 100] == 'evil.com'
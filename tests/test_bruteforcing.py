@@ -0,0 +1,121 @@
+import json
+import socket
+
+import pytest
+
+from bruteforcing import Engine, bruteforce
+from protocols import FTPProtocol, HTTPBasicProtocol, FatalError
+from standin_servers import start, start_web
+
+PASSWORDS = ['123456', 'password', 'letmein', 'qwerty', 'secret', 'dragon']
+
+
+@pytest.fixture
+def wordlist(tmp_path):
+    path = tmp_path / 'passwords.txt'
+    path.write_text('\n'.join(PASSWORDS) + '\n')
+    return str(path)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+def run(port, wordlist, journal, resume=False, workers=1):
+    return bruteforce('127.0.0.1', 'admin', wordlist, port, journal, resume=resume,
+                      protocol=FTPProtocol('127.0.0.1', port), workers=workers,
+                      retries=0, verbose=False)
+
+
+def test_finds_password(tmp_path, wordlist):
+    server = start('ftp', 'admin', 'secret')
+    journal = str(tmp_path / 'journal.json')
+    try:
+        assert run(server.server_address[1], wordlist, journal, workers=3) == 'secret'
+    finally:
+        stop(server)
+    (entry,) = json.load(open(journal)).values()
+    assert entry['status'] == 'found'
+
+
+def test_unanswered_password_is_not_skipped(tmp_path, wordlist):
+    # Nothing listens: every attempt errors, so nothing may count as tried.
+    port = free_port()
+    journal = str(tmp_path / 'journal.json')
+    assert run(port, wordlist, journal) is None
+    (entry,) = json.load(open(journal)).values()
+    assert entry['status'] == 'error'
+    assert entry['offset'] == 0
+
+    server = start('ftp', 'admin', 'secret', port)
+    try:
+        assert run(port, wordlist, journal, resume=True) == 'secret'
+    finally:
+        stop(server)
+
+
+def test_resume_continues_from_journal(tmp_path, wordlist):
+    server = start('ftp', 'admin', 'not-in-the-list')
+    port = server.server_address[1]
+    journal = str(tmp_path / 'journal.json')
+    try:
+        assert run(port, wordlist, journal) is None
+    finally:
+        stop(server)
+    (entry,) = json.load(open(journal)).values()
+    assert entry['status'] == 'exhausted'
+    assert entry['attempts'] == len(PASSWORDS)
+
+    # Pretend the run stopped after the first three passwords.
+    data = json.load(open(journal))
+    (key,) = data
+    data[key].update(status='running', offset=len('\n'.join(PASSWORDS[:3]) + '\n'),
+                     attempts=3)
+    json.dump(data, open(journal, 'w'))
+    server = start('ftp', 'admin', 'secret', port)
+    try:
+        assert run(port, wordlist, journal, resume=True) == 'secret'
+    finally:
+        stop(server)
+    (entry,) = json.load(open(journal)).values()
+    assert entry['attempts'] == 3 + PASSWORDS[3:].index('secret') + 1
+
+
+def test_http_basic_success_needs_2xx():
+    server = start('http', 'admin', 'secret')
+    protocol = HTTPBasicProtocol('127.0.0.1', server.server_address[1])
+    passwords = [(p, i) for i, p in enumerate(PASSWORDS)]
+    try:
+        assert Engine(protocol, workers=1).run('admin', passwords) == 'secret'
+    finally:
+        stop(server)
+
+
+def test_http_basic_missing_path_is_fatal():
+    # The web stand-in answers 404 for every path not listed.
+    server = start_web()
+    protocol = HTTPBasicProtocol('127.0.0.1', server.server_address[1], path='/nowhere')
+    try:
+        with pytest.raises(FatalError):
+            Engine(protocol, workers=1).run('admin', [('secret', 7)])
+    finally:
+        stop(server)
+
+
+def test_http_basic_redirect_is_fatal():
+    # With soft404='302' the stand-in redirects every unknown path, whatever
+    # the credentials; that must not be taken for a found password.
+    server = start_web(soft404='302')
+    protocol = HTTPBasicProtocol('127.0.0.1', server.server_address[1], path='/admin')
+    try:
+        with pytest.raises(FatalError):
+            Engine(protocol, workers=1).run('admin', [('wrong', 0)])
+    finally:
+        stop(server)
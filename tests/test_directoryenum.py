@@ -0,0 +1,49 @@
+import contextlib
+import io
+
+import pytest
+
+from DirectoryEnum import DirEnumerator, normalize_url, parse_extensions
+from standin_servers import start_web
+
+PATHS = {'/index.html', '/admin/', '/admin/panel.html', '/admin/users/'}
+WORDS = ['admin', 'panel', 'index', 'users'] + [f'w{i}' for i in range(30)]
+
+
+@pytest.mark.parametrize('method', ['GET', 'HEAD'])
+@pytest.mark.parametrize('soft404', ['none', '200', '302'])
+def test_recursive_scan_finds_only_real_paths(soft404, method):
+    server = start_web(PATHS, soft404)
+    base = f'127.0.0.1:{server.server_address[1]}'
+    enum = DirEnumerator(base, concurrency=4, method=method, max_depth=1)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            found = enum.run(WORDS)
+    finally:
+        server.shutdown()
+    # admin/users/ is found at depth 1 but not recursed into.
+    assert sorted(found) == sorted(f'http://{base}{path}' for path in PATHS)
+
+
+def test_calibration_is_per_directory():
+    server = start_web(PATHS, '302')
+    base = f'127.0.0.1:{server.server_address[1]}'
+    enum = DirEnumerator(base, concurrency=2, max_depth=1)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            enum.run(['admin', 'w0'])
+    finally:
+        server.shutdown()
+    root, admin = f'http://{base}/', f'http://{base}/admin/'
+    assert set(enum.fingerprints) == {root, admin}
+    assert enum.fingerprints[root]['.html'][302]['locations'] == {'/login?next={path}'}
+    assert enum.fingerprints[admin]['.html'][302]['locations'] == {'/login?next={path}'}
+
+
+def test_normalize_url():
+    assert normalize_url('http://Host:80//a/./b/../c') == 'http://host/a/c/'
+    assert normalize_url('https://host:443/a/') == 'https://host/a/'
+
+
+def test_parse_extensions():
+    assert parse_extensions('.php,bak,none,php') == ['.php', '.bak', '']
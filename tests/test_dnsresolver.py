@@ -0,0 +1,100 @@
+import asyncio
+import struct
+import time
+
+import pytest
+
+from dnsresolver import (NEGATIVE_TTL, RCODE_NXDOMAIN, TYPE_A, TYPE_CNAME, AsyncResolver,
+                         DNSCache, build_query, build_response, parse_message)
+from standin_servers import start_dns
+
+RECORDS = {'www.example.test': ['10.0.0.1'], 'api.example.test': ['10.0.0.2', '10.0.0.3']}
+
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+def resolve(server, names, **options):
+    async def run():
+        async with AsyncResolver([server.server_address], timeout=1.0, **options) as resolver:
+            return {name: await resolver.resolve(name) for name in names}
+    return asyncio.run(run())
+
+
+def test_query_round_trip():
+    query = parse_message(build_query(0x1234, 'WWW.Example.Test.'))
+    assert query['id'] == 0x1234
+    assert query['question'] == ('www.example.test', TYPE_A)
+    assert query['rcode'] == 0
+    assert query['answers'] == query['authority'] == []
+
+
+def test_response_round_trip():
+    query = parse_message(build_query(7, 'www.example.test'))
+    reply = parse_message(build_response(query, [(TYPE_CNAME, 30, 'web.example.test'),
+                                                 (TYPE_A, 60, '10.0.0.1')]))
+    assert reply['id'] == 7
+    assert reply['question'] == ('www.example.test', TYPE_A)
+    # Both records point back at the question name with a compression pointer.
+    assert reply['answers'] == [('www.example.test', TYPE_CNAME, 30, 'web.example.test'),
+                                ('www.example.test', TYPE_A, 60, '10.0.0.1')]
+    nxdomain = parse_message(build_response(query, [], RCODE_NXDOMAIN))
+    assert nxdomain['rcode'] == RCODE_NXDOMAIN
+    assert nxdomain['answers'] == []
+
+
+@pytest.mark.parametrize('data', [b'', b'\x00' * 5, build_query(1, 'www.example.test')[:-3]])
+def test_parse_rejects_truncated(data):
+    # The errors the resolver and the stand-in drop datagrams on.
+    with pytest.raises((ValueError, IndexError, struct.error)):
+        parse_message(data)
+
+
+def test_resolves_against_standin():
+    server = start_dns(RECORDS)
+    try:
+        found = resolve(server, ['www.example.test', 'API.example.test.', 'nope.example.test'])
+    finally:
+        stop(server)
+    assert found == {'www.example.test': ['10.0.0.1'],
+                     'API.example.test.': ['10.0.0.2', '10.0.0.3'],
+                     'nope.example.test': []}
+
+
+def test_cache_remembers_nxdomain(tmp_path):
+    path = str(tmp_path / 'dns_cache.json')
+    server = start_dns(RECORDS, ttl=120)
+    try:
+        cache = DNSCache(path)
+        start = time.time()
+        resolve(server, ['www.example.test', 'nope.example.test'], cache=cache)
+        # The stand-in sends no SOA, so the negative TTL is the default one.
+        addresses, expires = cache.entries['nope.example.test']
+        assert addresses == []
+        assert start + NEGATIVE_TTL <= expires <= time.time() + NEGATIVE_TTL
+        addresses, expires = cache.entries['www.example.test']
+        assert addresses == ['10.0.0.1']
+        assert start + 120 <= expires <= time.time() + 120
+        queries = server.hits
+
+        # Saved on close and loaded by the next run: no queries this time.
+        cache = DNSCache(path)
+        found = resolve(server, ['www.example.test', 'nope.example.test'], cache=cache)
+        assert found == {'www.example.test': ['10.0.0.1'], 'nope.example.test': []}
+        assert cache.hits == 2
+        assert server.hits == queries
+    finally:
+        stop(server)
+
+
+def test_cache_expires_entries():
+    cache = DNSCache()
+    cache.put('gone.example.test', [], 0.05)
+    cache.put('never.example.test', ['10.0.0.1'], 0)
+    assert cache.get('gone.example.test') == []
+    assert cache.get('never.example.test') is None
+    time.sleep(0.1)
+    assert cache.get('gone.example.test') is None
+    assert len(cache) == 0
@@ -0,0 +1,79 @@
+import ipaddress
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from extracting_IPs import cidrs, collapse, distinct, group_by_prefix, parse_ipv4, to_dotted
+
+
+def random_addresses(rng, count=300):
+    # Clustered, with some dense runs, so that blocks actually merge.
+    base = rng.randrange(2 ** 32 - 8192)
+    ips = [base + rng.randrange(rng.choice([16, 256, 4096])) for _ in range(count)]
+    start = rng.randrange(2 ** 32 - 1024)
+    ips += range(start, start + rng.randrange(1, 1024))
+    return [str(ipaddress.IPv4Address(ip)) for ip in ips]
+
+
+def test_parse_round_trip():
+    addresses = ['0.0.0.0', '10.0.0.1', '192.168.1.100', '255.255.255.255']
+    ips = parse_ipv4(addresses)
+    assert ips.dtype == np.uint32
+    assert ips.tolist() == [int(ipaddress.IPv4Address(a)) for a in addresses]
+    assert to_dotted(ips) == addresses
+    assert parse_ipv4([a.encode() for a in addresses]).tolist() == ips.tolist()
+
+
+@pytest.mark.parametrize('addresses', [
+    ['1.2.3', '4.5.6.7.8'],
+    ['1.2.3.4.5'],
+    ['1..2.3'],
+    ['1.2.3.4x'],
+    ['1.2.3.256'],
+    ['1.2.3.+4'],
+    ['1.2.3.-4'],
+    [' 1.2.3.4'],
+    ['1.2.3. 4'],
+    ['1.2.3.4 '],
+    ['.1.2.3'],
+    ['1.2.3.'],
+    ['1.2.3.4', ''],
+])
+def test_parse_rejects_malformed(addresses):
+    with pytest.raises(ValueError):
+        parse_ipv4(addresses)
+
+
+def test_parse_drop_invalid():
+    assert to_dotted(parse_ipv4(['1.2.3.999', '1.2.3.4'], drop_invalid=True)) == ['1.2.3.4']
+
+
+@pytest.mark.parametrize('prefix', [32, 28, 24, 16])
+def test_collapse_matches_ipaddress(prefix):
+    rng = random.Random(prefix)
+    for _ in range(30):
+        addresses = random_addresses(rng)
+        expected = ipaddress.collapse_addresses(
+            ipaddress.ip_network(f'{a}/{prefix}', strict=False) for a in addresses)
+        assert cidrs(*collapse(parse_ipv4(addresses), prefix)) == [str(n) for n in expected]
+
+
+def test_collapse_edges():
+    assert cidrs(*collapse(parse_ipv4(['0.0.0.0', '255.255.255.255']), 0)) == ['0.0.0.0/0']
+    assert cidrs(*collapse(np.zeros(0, dtype=np.uint32))) == []
+
+
+def test_group_by_prefix_matches_counter():
+    addresses = random_addresses(random.Random(7), 2000)
+    expected = Counter(str(ipaddress.ip_network(f'{a}/24', strict=False).network_address)
+                       for a in addresses)
+    networks, counts = group_by_prefix(parse_ipv4(addresses), 24)
+    assert dict(zip(to_dotted(networks), counts.tolist())) == expected
+    assert list(networks) == sorted(networks)
+
+
+def test_distinct():
+    ips = parse_ipv4(['10.0.0.2', '10.0.0.1', '10.0.0.2'])
+    assert to_dotted(distinct(ips)) == ['10.0.0.1', '10.0.0.2']
@@ -0,0 +1,49 @@
+import random
+import re
+
+from ioc_scanner import PRIORITY, IOCScanner
+from regex import regex_examples
+
+EXTRA = [
+    "C:\\Users\\bob\\report.docx", "from", "mail", "bob@corp.example", "10.0.0.5",
+    "550e8400-e29b-41d4-a716-446655440000", "12/12/2023", "25/12/2023", "opened",
+]
+
+
+def mixed_lines(rng, count=2000):
+    pieces = [example for name in PRIORITY for example in regex_examples[name]["examples"]]
+    pieces += EXTRA
+    for _ in range(count):
+        yield " ".join(rng.choice(pieces) for _ in range(rng.randint(2, 6)))
+
+
+def test_paths_stop_at_whitespace():
+    line = "2023-10-01 opened C:\\Users\\bob\\report.docx from 10.0.0.5 mail bob@corp.example\n"
+    found = [(m.type, m.value) for m in IOCScanner(max_line=0).scan(line)]
+    assert ("windows_path", "C:\\Users\\bob\\report.docx") in found
+    assert ("ipv4", "10.0.0.5") in found
+    assert ("email", "bob@corp.example") in found
+
+    line = "C:\\temp\\x.log 550e8400-e29b-41d4-a716-446655440000 25/12/2023\n"
+    found = [(m.type, m.value) for m in IOCScanner(max_line=0).scan(line)]
+    assert ("uuid", "550e8400-e29b-41d4-a716-446655440000") in found
+    assert ("date", "25/12/2023") in found
+    assert all(kind != "unix_path" for kind, _ in found)
+
+
+def test_matches_per_pattern_finditer():
+    # Every match a pattern finds on its own is either reported as is or
+    # lost to another indicator at the same place, never swallowed whole.
+    scanner = IOCScanner(max_line=0)
+    for line in mixed_lines(random.Random(44)):
+        found = list(scanner.scan(line))
+        spans = {(m.type, m.start, m.end) for m in found}
+        for name in PRIORITY:
+            for m in re.finditer(regex_examples[name]["pattern"], line):
+                if (name, m.start(), m.end()) in spans:
+                    continue
+                covering = [f for f in found if f.start <= m.start() and m.end() <= f.end]
+                overlapping = [f for f in found if f.start < m.end() and m.start() < f.end]
+                assert overlapping, (line, name, m.group())
+                assert all(" " not in f.value for f in covering
+                           if f.type in ("windows_path", "unix_path")), (line, name, m.group())
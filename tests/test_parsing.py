@@ -0,0 +1,34 @@
+from collections import Counter
+
+from parsing import count_logins, parse_attempt, sketch_logins
+
+SYSLOG = """\
+Oct 11 10:00:01 host CRON[812]: (root) CMD (run-parts /etc/cron.hourly)
+Oct 11 10:00:02 host sshd[901]: Failed password for invalid user bob from 10.0.0.5 port 22 ssh2
+Oct 11 10:00:03 host sudo:    alice : TTY=pts/0 ; PWD=/home/alice ; COMMAND=/bin/ls
+Oct 11 10:00:04 host systemd-logind[77]: New session 3 of user alice.
+Oct 11 10:00:05 host sshd[901]: Failed password for root from 10.0.0.6 port 22 ssh2
+Oct 11 10:00:06 host sshd[902]: Accepted publickey for alice from 10.0.0.7 port 22 ssh2
+Oct 11 10:00:07 host sshd[903]: Failed publickey for root from 10.0.0.6 port 22 ssh2
+admin
+admin
+
+"""
+
+
+def test_parse_attempt_ignores_other_messages():
+    attempts = [parse_attempt(line) for line in SYSLOG.splitlines()]
+    assert [a for a in attempts if a] == [
+        ('bob', '10.0.0.5'), ('root', '10.0.0.6'), ('root', '10.0.0.6'),
+        ('admin', None), ('admin', None),
+    ]
+
+
+def test_count_logins_agrees_with_sketch(tmp_path):
+    log = tmp_path / 'auth.log'
+    log.write_text(SYSLOG)
+    counts = count_logins(log)
+    assert counts == Counter({'root': 2, 'admin': 2, 'bob': 1})
+    users, sources = sketch_logins(log)
+    assert dict(users.top(10)) == dict(counts)
+    assert dict(sources.top(10)) == {'10.0.0.6': 2, '10.0.0.5': 1}
@@ -0,0 +1,92 @@
+import random
+from collections import Counter
+
+from sketches import CountMinSketch, HeavyHitters, SpaceSaving
+
+
+def zipf_stream(n=20000, items=2000, seed=1):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(items)]
+    return [f'item{i}' for i in rng.choices(range(items), weights, k=n)]
+
+
+def test_count_min_bounds():
+    stream = zipf_stream()
+    exact = Counter(stream)
+    sketch = CountMinSketch(epsilon=0.01, delta=0.01)
+    for item in stream:
+        sketch.add(item)
+    bound = sketch.epsilon * sketch.total
+    errors = [sketch.estimate(item) - count for item, count in exact.items()]
+    assert min(errors) >= 0                         # never an underestimate
+    assert sum(e > bound for e in errors) <= 0.01 * len(errors) + 1
+    assert sketch.estimate('never seen') <= bound
+
+
+def test_count_min_merge_equals_single_pass():
+    stream = zipf_stream()
+    whole, left, right = (CountMinSketch(0.01, 0.01) for _ in range(3))
+    for item in stream:
+        whole.add(item)
+    for item in stream[:7000]:
+        left.add(item)
+    for item in stream[7000:]:
+        right.add(item)
+    left.merge(right)
+    assert left.table == whole.table and left.total == whole.total
+
+
+def test_space_saving_keeps_frequent_items():
+    stream = zipf_stream()
+    exact = Counter(stream)
+    k = 50
+    top = SpaceSaving(k)
+    for item in stream:
+        top.add(item)
+    kept = {item: (count, error) for item, count, error in top.top()}
+    for item, count in exact.items():
+        if count > len(stream) / k:
+            assert item in kept
+    for item, (count, error) in kept.items():
+        assert count - error <= exact[item] <= count
+
+
+def test_heavy_hitters_matches_exact_top():
+    stream = zipf_stream()
+    exact = Counter(stream)
+    hitters = HeavyHitters(k=50, epsilon=0.001)
+    for item in stream:
+        hitters.add(item)
+    top = hitters.top(5)
+    assert [item for item, _ in top] == [item for item, _ in exact.most_common(5)]
+    for item, estimate in top:
+        assert exact[item] <= estimate <= exact[item] + hitters.error_bound()
+
+
+def test_heavy_hitters_merge():
+    stream = zipf_stream()
+    exact = Counter(stream)
+    shards = [HeavyHitters(k=50, epsilon=0.001) for _ in range(4)]
+    for i, item in enumerate(stream):
+        shards[i % 4].add(item)
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(shard)
+    assert merged.total == len(stream)
+    assert [item for item, _ in merged.top(3)] == [item for item, _ in exact.most_common(3)]
+
+
+
+def test_heavy_hitters_slots_keep_bounds():
+    # A coarse sketch, so the estimates new slots start from are well above
+    # the true counts: the error must still cover the difference.
+    stream = zipf_stream()
+    shards = [HeavyHitters(k=50, epsilon=0.05) for _ in range(2)]
+    for i, item in enumerate(stream):
+        shards[i % 2].add(item)
+    exact = Counter(stream[::2])
+    for item, count, error in shards[0].top_k.top():
+        assert count - error <= exact[item] <= count
+    exact = Counter(stream)
+    for item, count, error in shards[0].merge(shards[1]).top_k.top():
+        assert count - error <= exact[item] <= count
@@ -0,0 +1,69 @@
+import asyncio
+
+from dnsresolver import AsyncResolver
+from standin_servers import start_dns
+from subdomainEnum import CandidateQueue, WildcardFilter
+
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+def test_wildcard_filter():
+    # *.example.test answers 10.9.9.9; www has an address of its own, and
+    # cdn shares the wildcard's, so it cannot be told from a missing name.
+    server = start_dns({'www.example.test': ['10.0.0.1'], 'cdn.example.test': ['10.9.9.9']},
+                       wildcard=('example.test', '10.9.9.9'))
+
+    async def run():
+        async with AsyncResolver([server.server_address], timeout=1.0) as resolver:
+            wildcards = WildcardFilter(resolver)
+            kept = []
+            for name in ['www.example.test', 'cdn.example.test', 'random.example.test',
+                         'a.plain.test']:
+                addresses = await resolver.resolve(name)
+                if addresses and not await wildcards.is_wildcard(name, addresses):
+                    kept.append(name)
+            return wildcards, kept
+
+    try:
+        wildcards, kept = asyncio.run(run())
+    finally:
+        stop(server)
+    assert kept == ['www.example.test']
+    assert wildcards.filtered == 2
+    assert wildcards.zones['example.test'].result() == frozenset(['10.9.9.9'])
+
+
+def discover(server, words, max_generation):
+    async def run():
+        candidates = CandidateQueue('example.test', words, max_generation=max_generation)
+        tried, found = [], []
+        async with AsyncResolver([server.server_address], timeout=1.0) as resolver:
+            async for name, addresses in resolver.resolve_many(candidates, 20):
+                candidates.completed(name, bool(addresses))
+                tried.append(name)
+                if addresses:
+                    found.append(name)
+        return candidates, tried, sorted(found)
+    return asyncio.run(run())
+
+
+def test_candidates_feed_permutations_back():
+    # Only www and api1 are in the wordlist; api2 is a permutation of api1,
+    # and api2-dev one of api2.
+    names = ['www', 'api1', 'api2', 'api2-dev']
+    server = start_dns({f'{name}.example.test': ['10.0.0.1'] for name in names})
+    try:
+        candidates, tried, found = discover(server, ['www', 'api1', 'mail'], 1)
+        assert found == ['api1.example.test', 'api2.example.test', 'www.example.test']
+        assert candidates.generated > 0
+        assert not candidates.in_flight
+        # api1 comes back from the permutations of api2, and is not tried again.
+        assert len(tried) == len(set(tried))
+
+        _, _, found = discover(server, ['www', 'api1', 'mail'], 2)
+        assert found == sorted(f'{name}.example.test' for name in names)
+    finally:
+        stop(server)